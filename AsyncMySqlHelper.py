@@ -0,0 +1,165 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict
+
+from MySqlHelper import MySqlHelper, ConnectionPool
+
+
+class _AsyncOperations:
+    """
+    异步版本的常用数据库操作
+    每个操作在线程池中调用对应的MySqlHelper方法，事件循环不会被阻塞
+    """
+    
+    _helper: MySqlHelper
+    _executor: ThreadPoolExecutor
+    
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def execute_query(self, query: str, params: Tuple = None) -> Optional[int]:
+        """执行SQL语句（INSERT, UPDATE, DELETE），返回受影响的行数"""
+        return await self._run(self._helper.execute_query, query, params)
+    
+    async def fetch_all(self, query: str, params: Tuple = None) -> Optional[List[Dict]]:
+        """执行查询并返回所有结果"""
+        return await self._run(self._helper.fetch_all, query, params)
+    
+    async def fetch_one(self, query: str, params: Tuple = None) -> Optional[Dict]:
+        """执行查询并返回单条结果"""
+        return await self._run(self._helper.fetch_one, query, params)
+    
+    async def insert(self, table: str, data: Dict) -> Optional[int]:
+        """插入单条数据，返回插入的行ID"""
+        return await self._run(self._helper.insert, table, data)
+    
+    async def insert_many(self, table: str, data_list: List[Dict], chunk_size: int = 1000) -> Optional[int]:
+        """批量插入数据，返回受影响的行数"""
+        return await self._run(self._helper.insert_many, table, data_list, chunk_size)
+    
+    async def update(self, table: str, data: Dict, condition: str, condition_params: Tuple = None) -> Optional[int]:
+        """更新数据，返回受影响的行数"""
+        return await self._run(self._helper.update, table, data, condition, condition_params)
+    
+    async def delete(self, table: str, condition: str, params: Tuple = None) -> Optional[int]:
+        """删除数据，返回受影响的行数"""
+        return await self._run(self._helper.delete, table, condition, params)
+
+
+class AsyncTransaction(_AsyncOperations):
+    """
+    异步事务，通过 async with db.transaction() as tx 使用
+    事务内的操作固定使用同一个连接；正常退出时提交，发生异常时回滚。
+    一个连接不能同时在多个线程中使用，事务的操作在它自己的单线程池中依次执行，
+    在事务内用asyncio.gather并发调用也是安全的。
+    """
+    
+    def __init__(self, owner: 'AsyncMySqlHelper'):
+        self._owner = owner
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mysql-transaction')
+        self._connection = None
+        self._helper = None
+    
+    def _begin(self):
+        connection = self._owner.pool.get_connection()
+        try:
+            connection.autocommit = False
+        except Exception:
+            self._owner.pool.release(connection)
+            raise
+        self._connection = connection
+        # helper的所有操作都在这个事务中执行，由_finish统一提交或回滚
+        self._helper = MySqlHelper.from_connection(connection, autocommit=False, in_transaction=True)
+    
+    def _finish(self, commit: bool):
+        try:
+            if commit:
+                self._connection.commit()
+            else:
+                self._connection.rollback()
+        finally:
+            try:
+                self._connection.autocommit = self._owner.autocommit
+            finally:
+                self._owner.pool.release(self._connection)
+                self._connection = None
+    
+    async def __aenter__(self):
+        try:
+            await self._run(self._begin)
+        except BaseException:
+            self._executor.shutdown(wait=False)
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self._run(self._finish, exc_type is None)
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+class AsyncMySqlHelper(_AsyncOperations):
+    """
+    MySqlHelper的asyncio版本
+    基于连接池和线程池，同一进程内可以同时执行多条查询
+    """
+    
+    def __init__(self, host: str = 'localhost',
+                 database: str = None,
+                 user: str = 'root',
+                 password: str = None,
+                 port: int = 3306,
+                 autocommit: bool = True,
+                 pool_size: int = 10,
+                 pool_timeout: float = 10.0,
+                 max_workers: int = None,
+                 pool: ConnectionPool = None):
+        """
+        初始化数据库连接参数
+        
+        Args:
+            host: 数据库主机地址
+            database: 数据库名称
+            user: 用户名
+            password: 密码
+            port: 端口号
+            autocommit: 是否自动提交事务
+            pool_size: 连接池大小，即同时执行的查询数上限
+            pool_timeout: 从连接池借出连接的最长等待时间（秒）
+            max_workers: 执行查询的线程数，默认与连接池大小相同
+            pool: 共享的连接池
+        """
+        self.autocommit = autocommit
+        self._helper = MySqlHelper(host=host, database=database, user=user, password=password,
+                                   port=port, autocommit=autocommit, pool_size=pool_size,
+                                   pool_timeout=pool_timeout, pool=pool)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or (pool.size if pool else pool_size),
+                                            thread_name_prefix='mysql')
+    
+    @property
+    def pool(self) -> ConnectionPool:
+        return self._helper.pool
+    
+    async def connect(self) -> bool:
+        """创建连接池并验证连接"""
+        return await self._run(self._helper.connect)
+    
+    async def disconnect(self):
+        """关闭连接池和线程池"""
+        await self._run(self._helper.disconnect)
+        self._executor.shutdown(wait=False)
+    
+    def transaction(self) -> AsyncTransaction:
+        """开始一个异步事务"""
+        return AsyncTransaction(self)
+    
+    # 使用异步上下文管理器，支持async with语句
+    async def __aenter__(self):
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
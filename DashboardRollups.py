@@ -0,0 +1,318 @@
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from MySqlHelper import MySqlHelper
+
+
+class DashboardRollups:
+    """
+    可视化看板的预聚合表
+    按天维护 sales_data 和 user_behavior 的汇总表，看板接口只查询汇总表，
+    响应时间不随原始表增长而变慢。
+    
+    每次更新时，最近recent_days天的汇总行按原始表重新聚合；更早日期的行按自增id增量累加
+    上次处理之后新插入的行。自增id不按提交顺序出现，id较小的行可能在更新之后才提交，
+    重新聚合最近几天可以把这些行补进汇总表。日期早于该窗口且晚提交的行、以及原始表中的
+    修改和删除不会反映到汇总表，需要时调用 refresh(rebuild=True) 重建。
+    
+    重新聚合按日期列筛选原始表，部署时执行一次 create_date_indexes()（或"week5 SQL.sql"中的
+    CREATE INDEX语句）为原始表建索引。Web应用调用 start() 在后台线程中定时更新，
+    请求处理中不做更新。
+    """
+    
+    CREATE_TABLES = [
+        """
+        CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+            sales_date DATE NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            region VARCHAR(50) NOT NULL,
+            product_name VARCHAR(100) NOT NULL,
+            total_amount DECIMAL(16,2) NOT NULL DEFAULT 0,
+            order_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (sales_date, category, region, product_name)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS behavior_daily_rollup (
+            action_date DATE NOT NULL,
+            action_type VARCHAR(50) NOT NULL,
+            page_url VARCHAR(200) NOT NULL,
+            action_count INT NOT NULL DEFAULT 0,
+            total_duration BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (action_date, action_type, page_url)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            rollup_name VARCHAR(50) PRIMARY KEY,
+            last_id BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+    ]
+    
+    # 汇总表名 -> (原始表, 原始表的日期列, 汇总表的日期列, 聚合语句)
+    # 聚合语句中的{where}为筛选原始行的条件
+    ROLLUPS = {
+        'sales_daily_rollup': ('sales_data', 'sales_date', 'sales_date', """
+            INSERT INTO sales_daily_rollup
+                (sales_date, category, region, product_name, total_amount, order_count)
+            SELECT sales_date, COALESCE(category, ''), COALESCE(region, ''),
+                   COALESCE(product_name, ''), COALESCE(SUM(sales_amount), 0), COUNT(*)
+            FROM sales_data
+            WHERE {where} AND sales_date IS NOT NULL
+            GROUP BY sales_date, COALESCE(category, ''), COALESCE(region, ''), COALESCE(product_name, '')
+            ON DUPLICATE KEY UPDATE
+                total_amount = total_amount + VALUES(total_amount),
+                order_count = order_count + VALUES(order_count)
+        """),
+        'behavior_daily_rollup': ('user_behavior', 'action_time', 'action_date', """
+            INSERT INTO behavior_daily_rollup
+                (action_date, action_type, page_url, action_count, total_duration)
+            SELECT DATE(action_time), COALESCE(action_type, ''), COALESCE(page_url, ''),
+                   COUNT(*), COALESCE(SUM(duration), 0)
+            FROM user_behavior
+            WHERE {where} AND action_time IS NOT NULL
+            GROUP BY DATE(action_time), COALESCE(action_type, ''), COALESCE(page_url, '')
+            ON DUPLICATE KEY UPDATE
+                action_count = action_count + VALUES(action_count),
+                total_duration = total_duration + VALUES(total_duration)
+        """),
+    }
+    
+    def __init__(self, db: MySqlHelper, refresh_interval: float = 5.0, recent_days: int = 3):
+        """
+        Args:
+            db: 已连接的MySqlHelper
+            refresh_interval: 两次增量更新之间的最短间隔（秒）
+            recent_days: 每次更新时重新聚合的天数（含今天），应大于写事务可能持续的时间
+        """
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.recent_days = recent_days
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def ensure_tables(self) -> bool:
+        """创建汇总表和进度表，原始表缺少日期索引时给出提示"""
+        for statement in self.CREATE_TABLES:
+            if self.db.execute_query(statement) is None:
+                return False
+        for name in self.ROLLUPS:
+            if self.db.execute_query(
+                "INSERT IGNORE INTO rollup_state (rollup_name, last_id) VALUES (%s, 0)", (name,)
+            ) is None:
+                return False
+        for table, column in self.missing_date_indexes():
+            print(f"{table}.{column}没有索引，重新聚合最近{self.recent_days}天时需要扫描全表，"
+                  f"请执行 DashboardRollups.create_date_indexes()")
+        return True
+    
+    def missing_date_indexes(self) -> List[Tuple[str, str]]:
+        """返回没有以日期列开头的索引的原始表和日期列"""
+        missing = []
+        for source, source_date, _, _ in self.ROLLUPS.values():
+            found = self.db.fetch_one("""
+                SELECT 1 AS found FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = %s
+                  AND column_name = %s AND seq_in_index = 1
+                LIMIT 1
+            """, (source, source_date), cache=False)
+            if found is None:
+                missing.append((source, source_date))
+        return missing
+    
+    def create_date_indexes(self) -> bool:
+        """
+        为原始表的日期列建索引，已有索引的表跳过
+        大表上建索引耗时较长，在部署或维护时单独执行，不要在请求处理中调用
+        
+        Returns:
+            bool: 是否全部创建成功
+        """
+        for table, column in self.missing_date_indexes():
+            print(f"为{table}.{column}创建索引...")
+            if self.db.execute_query(f"CREATE INDEX idx_{table}_{column} ON {table} ({column})") is None:
+                return False
+        return True
+    
+    def refresh(self, rebuild: bool = False) -> bool:
+        """
+        把上次更新之后新插入的原始数据合并进汇总表，并重新聚合最近recent_days天
+        
+        Args:
+            rebuild: 是否清空汇总表后从头重建
+        
+        Returns:
+            bool: 是否全部更新成功
+        """
+        with self._lock:
+            return self._refresh_all(rebuild)
+    
+    def refresh_if_stale(self) -> bool:
+        """
+        距上次更新超过refresh_interval时做一次增量更新
+        其他线程正在更新时不等待，直接沿用当前的汇总表
+        
+        Returns:
+            bool: 是否做了更新
+        """
+        if time.monotonic() - self._last_refresh < self.refresh_interval:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            # 拿到锁之前可能已有其他线程更新完
+            if time.monotonic() - self._last_refresh < self.refresh_interval:
+                return False
+            self._refresh_all(False)
+            return True
+        finally:
+            self._lock.release()
+    
+    def start(self):
+        """启动后台线程，每隔refresh_interval秒更新一次"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='DashboardRollups', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = None):
+        """停止后台更新线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_if_stale()
+            self._stop.wait(max(self._last_refresh + self.refresh_interval - time.monotonic(), 0.1))
+    
+    def _refresh_all(self, rebuild: bool) -> bool:
+        ok = all(self._refresh_one(name, rebuild) for name in self.ROLLUPS)
+        self._last_refresh = time.monotonic()
+        return ok
+    
+    def _refresh_one(self, name: str, rebuild: bool) -> bool:
+        source, source_date, rollup_date, statement = self.ROLLUPS[name]
+        
+        self.db.begin_transaction()
+        try:
+            # 锁住进度行，多个进程同时更新时不会重复累加
+            state = self.db.fetch_one(
+                "SELECT last_id FROM rollup_state WHERE rollup_name = %s FOR UPDATE", (name,)
+            )
+            latest = self.db.fetch_one(f"""
+                SELECT COALESCE(MAX(id), 0) AS max_id, CURDATE() - INTERVAL %s DAY AS cutoff
+                FROM {source}
+            """, (self.recent_days - 1,))
+            if state is None or latest is None:
+                self.db.rollback()
+                return False
+            
+            last_id = 0 if rebuild else state['last_id']
+            max_id, cutoff = latest['max_id'], latest['cutoff']
+            steps = [
+                # 清空最近几天（重建时清空全部）的汇总行
+                (f"DELETE FROM {name}" if rebuild else f"DELETE FROM {name} WHERE {rollup_date} >= %s",
+                 () if rebuild else (cutoff,)),
+                # 更早的日期只累加新插入的行
+                (statement.format(where=f"id > %s AND id <= %s AND {source_date} < %s"),
+                 (last_id, max_id, cutoff)),
+                # 最近几天按原始表重新聚合，包括id不大于上次进度、但在上次更新之后才提交的行；
+                # 大于max_id的行留给下次更新，既不会漏算也不会重复累加
+                (statement.format(where=f"id <= %s AND {source_date} >= %s"), (max_id, cutoff)),
+            ]
+            for query, params in steps:
+                if self.db.execute_query(query, params) is None:
+                    self.db.rollback()
+                    return False
+            if self.db.update('rollup_state', {'last_id': max_id},
+                              'rollup_name = %s', (name,)) is None:
+                self.db.rollback()
+                return False
+            
+            self.db.commit()
+            return True
+        
+        except Exception as e:
+            print(f"更新汇总表{name}错误: {e}")
+            if self.db.in_transaction:
+                self.db.rollback()
+            return False
+    
+    def sales_by_category_region(self) -> Dict:
+        """各类别在各地区的销售额，供SalesChart使用"""
+        rows = self.db.fetch_all("""
+            SELECT category, region, SUM(total_amount) AS amount
+            FROM sales_daily_rollup
+            GROUP BY category, region
+        """) or []
+        
+        categories = sorted({row['category'] for row in rows})
+        regions = sorted({row['region'] for row in rows})
+        amounts = {(row['category'], row['region']): float(row['amount']) for row in rows}
+        
+        return {
+            'categories': categories,
+            'regions': regions,
+            'series': [
+                {
+                    'name': category,
+                    'type': 'bar',
+                    'data': [amounts.get((category, region), 0.0) for region in regions]
+                }
+                for category in categories
+            ]
+        }
+    
+    def sales_trend(self) -> Dict:
+        """每日销售额和订单数，供SalesTrend使用"""
+        rows = self.db.fetch_all("""
+            SELECT sales_date, SUM(total_amount) AS sales, SUM(order_count) AS orders
+            FROM sales_daily_rollup
+            GROUP BY sales_date
+            ORDER BY sales_date
+        """) or []
+        
+        return {
+            'dates': [row['sales_date'].isoformat() for row in rows],
+            'sales': [float(row['sales']) for row in rows],
+            'orders': [int(row['orders']) for row in rows]
+        }
+    
+    def product_ranking(self, limit: int = 10) -> Dict:
+        """销售额最高的商品，供ProductRanking使用"""
+        rows = self.db.fetch_all("""
+            SELECT product_name, SUM(total_amount) AS sales, SUM(order_count) AS orders
+            FROM sales_daily_rollup
+            GROUP BY product_name
+            ORDER BY sales DESC
+            LIMIT %s
+        """, (limit,)) or []
+        
+        return {
+            'products': [row['product_name'] for row in rows],
+            'sales': [float(row['sales']) for row in rows],
+            'counts': [int(row['orders']) for row in rows]
+        }
+    
+    def user_behavior(self) -> Dict:
+        """各行为类型的次数和平均停留时长，供UserBehavior使用"""
+        rows = self.db.fetch_all("""
+            SELECT action_type, SUM(action_count) AS actions, SUM(total_duration) AS duration
+            FROM behavior_daily_rollup
+            GROUP BY action_type
+            ORDER BY actions DESC
+        """) or []
+        
+        return {
+            'actions': [row['action_type'] for row in rows],
+            'counts': [int(row['actions']) for row in rows],
+            'durations': [round(float(row['duration']) / int(row['actions']), 1) if row['actions'] else 0.0
+                          for row in rows]
+        }
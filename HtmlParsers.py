@@ -0,0 +1,252 @@
+"""
+爬虫页面解析后端
+每个后端从豆瓣Top250列表页和百度热搜页中提取原始文本字段，爬虫再把字段转换成结构化数据。
+selectolax和lxml为可选依赖，安装后自动优先使用；都没有安装时退回BeautifulSoup。
+"""
+
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:
+    # selectolax 1.0之前的版本只有Modest后端
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+    except ImportError:
+        SelectolaxHTMLParser = None
+
+
+class BeautifulSoupParser:
+    """基于BeautifulSoup和CSS选择器的解析后端，不需要额外依赖"""
+    
+    name = 'bs4'
+    
+    @staticmethod
+    def _text(elem, strip=True) -> Optional[str]:
+        if elem is None:
+            return None
+        return elem.get_text(strip=strip)
+    
+    def douban_items(self, html: str) -> List[Dict]:
+        soup = BeautifulSoup(html, 'html.parser')
+        items = []
+        for item in soup.select('.item'):
+            link_elem = item.select_one('a')
+            items.append({
+                'rank': self._text(item.select_one('em'), strip=False),
+                'title': self._text(item.select_one('.title')),
+                'rating': self._text(item.select_one('.rating_num'), strip=False),
+                'rating_count': self._text(item.select_one('.star span:last-child'), strip=False),
+                'info': self._text(item.select_one('.bd p'), strip=False),
+                'quote': self._text(item.select_one('.quote')),
+                'link': link_elem.get('href') if link_elem else None
+            })
+        return items
+    
+    def baidu_items(self, html: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        soup = BeautifulSoup(html, 'html.parser')
+        return [
+            (self._text(item.select_one('.c-single-text-ellipsis')),
+             self._text(item.select_one('.hot-index_1Bl1a')))
+            for item in soup.select('.category-wrap_iQLoo')
+        ]
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlParser:
+    """基于lxml的解析后端，XPath表达式在类加载时预编译"""
+    
+    name = 'lxml'
+    
+    if etree is not None:
+        DOUBAN_ITEMS = etree.XPath(f"//*[{_has_class('item')}]")
+        DOUBAN_FIELD_PATHS = {
+            'rank': etree.XPath("(.//em)[1]"),
+            'title': etree.XPath(f"(.//*[{_has_class('title')}])[1]"),
+            'rating': etree.XPath(f"(.//*[{_has_class('rating_num')}])[1]"),
+            'rating_count': etree.XPath(f"(.//*[{_has_class('star')}]/*[last()][self::span])[1]"),
+            'info': etree.XPath(f"(.//*[{_has_class('bd')}]//p)[1]"),
+            'quote': etree.XPath(f"(.//*[{_has_class('quote')}])[1]"),
+        }
+        DOUBAN_LINK = etree.XPath("(.//a)[1]/@href")
+        BAIDU_ITEMS = etree.XPath(f"//*[{_has_class('category-wrap_iQLoo')}]")
+        BAIDU_TITLE = etree.XPath(f"(.//*[{_has_class('c-single-text-ellipsis')}])[1]")
+        BAIDU_HOT_INDEX = etree.XPath(f"(.//*[{_has_class('hot-index_1Bl1a')}])[1]")
+    
+    def __init__(self):
+        if etree is None:
+            raise ImportError("lxml is not installed")
+    
+    @staticmethod
+    def _text(found, strip=True) -> Optional[str]:
+        if not found:
+            return None
+        # 与BeautifulSoup的get_text(strip=True)一致：逐段去掉空白后拼接
+        if strip:
+            return ''.join(text.strip() for text in found[0].itertext())
+        return ''.join(found[0].itertext())
+    
+    def douban_items(self, html: str) -> List[Dict]:
+        tree = lxml_html.fromstring(html)
+        items = []
+        for item in self.DOUBAN_ITEMS(tree):
+            fields = {name: path(item) for name, path in self.DOUBAN_FIELD_PATHS.items()}
+            link = self.DOUBAN_LINK(item)
+            items.append({
+                'rank': self._text(fields['rank'], strip=False),
+                'title': self._text(fields['title']),
+                'rating': self._text(fields['rating'], strip=False),
+                'rating_count': self._text(fields['rating_count'], strip=False),
+                'info': self._text(fields['info'], strip=False),
+                'quote': self._text(fields['quote']),
+                'link': str(link[0]) if link else None
+            })
+        return items
+    
+    def baidu_items(self, html: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        tree = lxml_html.fromstring(html)
+        return [
+            (self._text(self.BAIDU_TITLE(item)), self._text(self.BAIDU_HOT_INDEX(item)))
+            for item in self.BAIDU_ITEMS(tree)
+        ]
+
+
+class SelectolaxParser:
+    """基于selectolax的解析后端，C实现的HTML解析和CSS选择器，速度最快"""
+    
+    name = 'selectolax'
+    
+    def __init__(self):
+        if SelectolaxHTMLParser is None:
+            raise ImportError("selectolax is not installed")
+    
+    @staticmethod
+    def _text(node, strip=True) -> Optional[str]:
+        if node is None:
+            return None
+        return node.text(deep=True, separator='', strip=strip)
+    
+    def douban_items(self, html: str) -> List[Dict]:
+        tree = SelectolaxHTMLParser(html)
+        items = []
+        for item in tree.css('.item'):
+            link_node = item.css_first('a')
+            items.append({
+                'rank': self._text(item.css_first('em'), strip=False),
+                'title': self._text(item.css_first('.title')),
+                'rating': self._text(item.css_first('.rating_num'), strip=False),
+                'rating_count': self._text(item.css_first('.star span:last-child'), strip=False),
+                'info': self._text(item.css_first('.bd p'), strip=False),
+                'quote': self._text(item.css_first('.quote')),
+                'link': link_node.attributes.get('href') if link_node else None
+            })
+        return items
+    
+    def baidu_items(self, html: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        tree = SelectolaxHTMLParser(html)
+        return [
+            (self._text(item.css_first('.c-single-text-ellipsis')),
+             self._text(item.css_first('.hot-index_1Bl1a')))
+            for item in tree.css('.category-wrap_iQLoo')
+        ]
+
+
+# 按速度从快到慢排列，get_parser默认选第一个可用的
+PARSERS = {
+    SelectolaxParser.name: SelectolaxParser,
+    LxmlParser.name: LxmlParser,
+    BeautifulSoupParser.name: BeautifulSoupParser,
+}
+
+
+def available_parsers() -> List[str]:
+    """返回当前环境可用的后端名称"""
+    names = []
+    for name, parser_class in PARSERS.items():
+        try:
+            parser_class()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_parser(name: str = None):
+    """
+    创建解析后端
+    
+    Args:
+        name: 'selectolax'、'lxml'或'bs4'，为None时使用最快的可用后端
+    """
+    if name is not None:
+        return PARSERS[name]()
+    return PARSERS[available_parsers()[0]]()
+
+
+def benchmark(kind: str, pages: List[str], names: List[str] = None, repeat: int = 20) -> Dict[str, float]:
+    """
+    比较各后端解析同一批页面的耗时，并检查解析结果是否一致
+    
+    Args:
+        kind: 'douban'或'baidu'
+        pages: 页面HTML列表
+        names: 参与比较的后端，默认全部可用后端
+        repeat: 每个后端重复解析的轮数
+    
+    Returns:
+        Dict[str, float]: 后端名称 -> 平均每页耗时（毫秒）
+    """
+    names = names or available_parsers()
+    results = {}
+    expected = None
+    
+    for name in names:
+        parse = getattr(get_parser(name), f'{kind}_items')
+        
+        output = [parse(page) for page in pages]
+        if expected is None:
+            expected = output
+        elif output != expected:
+            print(f"{name}: 解析结果与{names[0]}不一致")
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                parse(page)
+        results[name] = (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+    
+    return results
+
+
+def main():
+    """用法: python HtmlParsers.py douban|baidu 页面1.html [页面2.html ...]"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('douban', 'baidu'):
+        print(main.__doc__)
+        return
+    
+    pages = []
+    for path in sys.argv[2:]:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    
+    results = benchmark(sys.argv[1], pages)
+    baseline = results.get(BeautifulSoupParser.name)
+    for name, elapsed in results.items():
+        speedup = f"  ({baseline / elapsed:.1f}x)" if baseline else ""
+        print(f"{name:>12}: {elapsed:8.3f} ms/页{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import ssl
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 安装了brotli时才声明支持br压缩
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+
+
+def decode_body(body: bytes, content_encoding: str = None) -> bytes:
+    """按Content-Encoding解压响应体"""
+    # 多重编码按应用顺序列出，解压时从后往前
+    for encoding in reversed((content_encoding or '').lower().split(',')):
+        encoding = encoding.strip()
+        if encoding in ('', 'identity'):
+            continue
+        if encoding in ('gzip', 'x-gzip'):
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                # 部分服务器发送不带zlib头的原始deflate数据
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+        elif encoding == 'br' and brotli is not None:
+            body = brotli.decompress(body)
+        else:
+            raise http.client.HTTPException(f"unsupported Content-Encoding: {encoding}")
+    return body
+
+
+class TokenBucket:
+    """
+    令牌桶限速器
+    平均每秒放行rate个请求，允许最多capacity个请求同时发出；多线程共用一个实例
+    """
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数，为0或None时不限速
+            capacity: 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """取走一个令牌，桶空时等待到有令牌为止"""
+        if not self.rate:
+            return
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpCache:
+    """
+    HTTP响应的磁盘缓存
+    每个URL一个gzip压缩文件，第一行是JSON格式的元数据（ETag、Last-Modified、保存时间），其后是响应体。
+    保存时间在max_age秒以内的缓存直接使用；过期后带If-None-Match/If-Modified-Since重新验证，
+    服务器返回304时继续使用缓存内容。
+    """
+    
+    def __init__(self, directory: str = '.http_cache', max_age: float = 3600, compresslevel: int = 6):
+        """
+        Args:
+            directory: 缓存目录
+            max_age: 新鲜期（秒），为0时每次都向服务器验证
+            compresslevel: gzip压缩级别
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.compresslevel = compresslevel
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.gz')
+    
+    def load(self, url: str) -> Optional[Tuple[Dict, bytes]]:
+        """读取缓存，返回(元数据, 响应体)，没有缓存或文件损坏时返回None"""
+        try:
+            with open(self._path(url), 'rb') as f:
+                data = gzip.decompress(f.read())
+            header, body = data.split(b'\n', 1)
+            meta = json.loads(header)
+        except (OSError, ValueError, EOFError, zlib.error):
+            return None
+        if meta.get('url') != url:
+            return None
+        return meta, body
+    
+    def store(self, url: str, headers: Dict[str, str], body: bytes, meta: Dict = None):
+        """
+        保存响应
+        
+        Args:
+            url: 请求地址
+            headers: 响应头（键为小写）
+            body: 解压后的响应体
+            meta: 304响应时传入原有元数据，沿用其中服务器未重新发送的校验字段
+        """
+        if 'no-store' in headers.get('cache-control', ''):
+            return
+        
+        meta = dict(meta or {})
+        meta['url'] = url
+        meta['stored_at'] = time.time()
+        for field in ('etag', 'last-modified'):
+            if field in headers:
+                meta[field] = headers[field]
+        
+        data = json.dumps(meta).encode('utf-8') + b'\n' + body
+        path = self._path(url)
+        # 先写临时文件再替换，并发抓取时不会读到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(data, self.compresslevel))
+        os.replace(tmp_path, path)
+    
+    def is_fresh(self, meta: Dict) -> bool:
+        return time.time() - meta.get('stored_at', 0) < self.max_age
+    
+    @staticmethod
+    def conditional_headers(meta: Dict) -> Dict[str, str]:
+        """根据缓存的校验字段生成条件请求头"""
+        headers = {}
+        if 'etag' in meta:
+            headers['If-None-Match'] = meta['etag']
+        if 'last-modified' in meta:
+            headers['If-Modified-Since'] = meta['last-modified']
+        return headers
+    
+    def record(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+    
+    def stats(self) -> Dict:
+        """返回缓存命中统计"""
+        with self._lock:
+            return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses}
+    
+    def clear(self):
+        """删除所有缓存文件"""
+        for name in os.listdir(self.directory):
+            if name.endswith('.gz'):
+                os.remove(os.path.join(self.directory, name))
+
+
+class HttpClient:
+    """
+    支持长连接的HTTP客户端
+    空闲连接按主机放在客户端共用的连接池中，任何线程发请求时取出一个，响应读完后放回，
+    不必每个请求都重新建立TCP/TLS连接；换一个线程池抓取时也继续使用已有的连接。
+    用完后调用close()关闭空闲连接。
+    """
+    
+    # 复用的连接可能已被服务器关闭，遇到这些错误时换新连接重试一次
+    RETRY_ERRORS = (ConnectionError, http.client.HTTPException)
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+    
+    def __init__(self, headers: Dict[str, str] = None, timeout: float = 10,
+                 rate_limiter: TokenBucket = None, verify_ssl: bool = False,
+                 cache: HttpCache = None, max_idle: int = 8, max_redirects: int = 5):
+        """
+        Args:
+            headers: 每个请求都带上的请求头
+            timeout: 连接和读取超时（秒）
+            rate_limiter: 限速器，每个请求发出前取一个令牌
+            verify_ssl: 是否校验HTTPS证书
+            cache: 响应缓存，为None时不缓存
+            max_idle: 每个主机最多保留的空闲连接数
+            max_redirects: 最多跟随的重定向次数
+        """
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.max_idle = max_idle
+        self.max_redirects = max_redirects
+        if verify_ssl:
+            self._ssl_context = ssl.create_default_context()
+        else:
+            self._ssl_context = ssl._create_unverified_context()
+        # (scheme, netloc) -> 空闲连接列表
+        self._idle = {}
+        self._lock = threading.Lock()
+    
+    def _get_connection(self, scheme: str, netloc: str) -> Tuple[http.client.HTTPConnection, bool]:
+        """从连接池取出一个连接，没有空闲连接时新建；返回(连接, 是否复用)"""
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop(), True
+        if scheme == 'https':
+            connection = http.client.HTTPSConnection(netloc, timeout=self.timeout,
+                                                     context=self._ssl_context)
+        else:
+            connection = http.client.HTTPConnection(netloc, timeout=self.timeout)
+        return connection, False
+    
+    def _release_connection(self, scheme: str, netloc: str, connection: http.client.HTTPConnection):
+        """把读完响应的连接放回连接池，池满时关闭"""
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+    
+    def request(self, url: str, headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        发送GET请求，跟随重定向
+        
+        Args:
+            url: 请求地址
+            headers: 本次请求额外的请求头
+        
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: 最终响应的状态码、响应头（键为小写）、解压后的响应体
+        """
+        for _ in range(self.max_redirects + 1):
+            status, response_headers, body = self._request_once(url, headers)
+            location = response_headers.get('location')
+            if status not in self.REDIRECT_STATUSES or not location:
+                return status, response_headers, body
+            # Location可以是相对地址
+            url = urljoin(url, location)
+        raise http.client.HTTPException(f"more than {self.max_redirects} redirects: {url}")
+    
+    def _request_once(self, url: str, headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = {'Accept-Encoding': ACCEPT_ENCODING, **self.headers, **(headers or {}),
+                           'Connection': 'keep-alive'}
+        
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        
+        while True:
+            connection, reused = self._get_connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers=request_headers)
+                response = connection.getresponse()
+                body = response.read()
+            except self.RETRY_ERRORS:
+                connection.close()
+                # 只有复用的连接才可能是被服务器关闭的，新连接出错时直接抛出
+                if reused:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            
+            if response.will_close:
+                connection.close()
+            else:
+                self._release_connection(parts.scheme, parts.netloc, connection)
+            response_headers = {k.lower(): v for k, v in response.getheaders()}
+            return response.status, response_headers, decode_body(body, response_headers.get('content-encoding'))
+    
+    def fetch(self, url: str) -> bytes:
+        """
+        GET请求并返回响应体，配置了缓存时优先使用缓存
+        
+        新鲜期内的缓存不发请求；过期的缓存发条件请求，返回304时沿用缓存内容。
+        状态码不是200或304时抛出异常。
+        """
+        cached = self.cache.load(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached[0]):
+            self.cache.record('hits')
+            return cached[1]
+        
+        headers = HttpCache.conditional_headers(cached[0]) if cached else None
+        status, response_headers, body = self.request(url, headers)
+        
+        if status == 304 and cached:
+            self.cache.record('revalidated')
+            self.cache.store(url, response_headers, cached[1], meta=cached[0])
+            return cached[1]
+        if status != 200:
+            raise http.client.HTTPException(f"HTTP {status}: {url}")
+        
+        if self.cache:
+            self.cache.record('misses')
+            self.cache.store(url, response_headers, body)
+        return body
+    
+    def get_text(self, url: str, encoding: str = 'utf-8') -> str:
+        """GET请求并返回解码后的响应体，状态码不是200时抛出异常"""
+        return self.fetch(url).decode(encoding)
+    
+    def close(self):
+        """关闭连接池中的空闲连接，之后仍可继续发请求"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
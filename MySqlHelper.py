@@ -1,6 +1,341 @@
 import mysql.connector
 from mysql.connector import Error
-from typing import List, Tuple, Any, Optional, Dict, Union
+from mysql.connector.errors import PoolError
+from typing import List, Tuple, Any, Optional, Dict, Union, Iterator
+from collections import OrderedDict
+from contextlib import contextmanager
+import queue
+import re
+import threading
+import time
+import weakref
+
+
+class ConnectionPool:
+    """
+    线程安全的MySQL连接池
+    按需创建连接，最多保持size个；借出时做健康检查，池满时等待timeout秒
+    """
+    
+    def __init__(self, size: int = 5, timeout: float = 10.0, health_check: bool = True, **connect_args):
+        """
+        初始化连接池
+        
+        Args:
+            size: 最大连接数
+            timeout: 借出连接的最长等待时间（秒）
+            health_check: 借出空闲连接前是否检查其可用性
+            connect_args: 传给mysql.connector.connect的连接参数
+        """
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.connect_args = connect_args
+        self._idle = queue.LifoQueue()  # 后进先出，优先复用最近用过的连接
+        self._slots = threading.BoundedSemaphore(size)
+    
+    def get_connection(self):
+        """
+        借出一个连接
+        
+        Returns:
+            可用的数据库连接
+            
+        Raises:
+            PoolError: 等待超时仍无空闲连接
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"等待连接超时（{self.timeout}秒），连接池大小: {self.size}")
+        
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = None
+            
+            # 丢弃已失效的空闲连接
+            if connection is not None and self.health_check and not connection.is_connected():
+                self._close_quietly(connection)
+                connection = None
+            
+            if connection is None:
+                connection = mysql.connector.connect(**self.connect_args)
+            return connection
+            
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, connection):
+        """归还连接，未提交的事务会被回滚"""
+        try:
+            if connection.is_connected():
+                if connection.in_transaction:
+                    connection.rollback()
+                self._idle.put(connection)
+        except Error:
+            self._close_quietly(connection)
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def connection(self):
+        """以with语句借出并自动归还连接"""
+        connection = self.get_connection()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                break
+    
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+
+class StatementCache:
+    """
+    服务端预处理语句缓存
+    预处理语句属于单个连接，因此每个连接各有一个LRU，键为(操作, 表名, 字段...)
+    """
+    
+    def __init__(self, max_size: int = 64):
+        """
+        Args:
+            max_size: 每个连接最多缓存的预处理语句数
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._caches = weakref.WeakKeyDictionary()  # 连接关闭回收后缓存随之释放
+        self._lock = threading.Lock()
+    
+    def get(self, connection, key: Tuple, build_query):
+        """
+        取出(或新建)某个连接上的预处理游标
+        
+        Args:
+            connection: 数据库连接
+            key: 语句的缓存键
+            build_query: 未命中时生成SQL语句的函数
+            
+        Returns:
+            (cursor, query): 预处理游标和对应的SQL语句
+        """
+        with self._lock:
+            cache = self._caches.get(connection)
+            if cache is None:
+                cache = self._caches[connection] = OrderedDict()
+            
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+                self.hits += 1
+                return entry
+            
+            self.misses += 1
+            entry = (connection.cursor(prepared=True), build_query())
+            cache[key] = entry
+            
+            if len(cache) > self.max_size:
+                _, (old_cursor, _) = cache.popitem(last=False)
+                self.evictions += 1
+                try:
+                    old_cursor.close()  # 关闭游标即释放服务端的预处理语句
+                except Error:
+                    pass
+            return entry
+    
+    def stats(self) -> Dict:
+        """命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'statements': sum(len(cache) for cache in self._caches.values()),
+            }
+
+
+class QueryCache:
+    """
+    查询结果缓存（LRU + TTL）
+    键为规范化后的SQL和参数；写操作按表名使相关缓存失效
+    """
+    
+    _TABLE_NAME = r'`?(?:\w+`?\.`?)?(\w+)`?'
+    _JOIN_TABLES = re.compile(r'\bJOIN\s+' + _TABLE_NAME, re.IGNORECASE)
+    # FROM后以逗号分隔的表列表，到下一个子句、JOIN或括号为止
+    _FROM_LISTS = re.compile(
+        r'\bFROM\s+([^();]+?)(?=\b(?:WHERE|GROUP|HAVING|ORDER|LIMIT|UNION|WINDOW|FOR|LOCK|INTO|JOIN|'
+        r'INNER|LEFT|RIGHT|CROSS|NATURAL|STRAIGHT_JOIN|ON|USING)\b|[();]|$)',
+        re.IGNORECASE)
+    _FROM_ITEM = re.compile(r'\s*' + _TABLE_NAME)
+    _INNERMOST_PARENS = re.compile(r'\(([^()]*)\)')
+    _SUBQUERY = '__subquery__'
+    _STRING_LITERALS = r"'(?:[^'\\]|\\.|'')*'" + r'|"(?:[^"\\]|\\.|"")*"'
+    _STRINGS = re.compile(_STRING_LITERALS, re.DOTALL)
+    _QUOTED = re.compile(f"({_STRING_LITERALS}|`[^`]*`)", re.DOTALL)
+    _WRITE_TABLES = re.compile(r'\b(?:INTO|UPDATE|FROM|TABLE)\s+`?(?:\w+`?\.`?)?(\w+)`?', re.IGNORECASE)
+    
+    def __init__(self, max_size: int = 256, ttl: float = 60.0):
+        """
+        Args:
+            max_size: 最多缓存的查询结果数
+            ttl: 缓存有效期（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (过期时间, 表名集合, 结果)
+        self._by_table = {}  # 表名 -> 依赖该表的key集合
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def make_key(cls, kind: str, query: str, params: Union[Tuple, Dict]) -> Optional[Tuple]:
+        """
+        规范化SQL（合并引号外的空白，字符串常量保持原样）并与参数组成缓存键
+        
+        Returns:
+            Optional[Tuple]: 缓存键；参数中有不可哈希的值（如列表）时返回None，表示不缓存
+        """
+        # split后奇数位置是引号括起的部分
+        parts = cls._QUOTED.split(query)
+        normalized = ''.join(part if i % 2 else re.sub(r'\s+', ' ', part) for i, part in enumerate(parts))
+        # 命名参数（%(name)s）以字典传入，按参数名排序后连同值一起放进键里
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        else:
+            params = tuple(params or ())
+        key = (kind, normalized.strip(), params)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    @classmethod
+    def tables_read(cls, query: str) -> set:
+        # 字符串常量中的括号和关键字不参与解析
+        query = cls._STRINGS.sub("''", query)
+        
+        # 由内向外取出括号（子查询）中的内容，外层的FROM列表中用占位符代替
+        segments = []
+        
+        def extract(match):
+            segments.append(match.group(1))
+            return f' {cls._SUBQUERY} '
+        
+        while True:
+            query, count = cls._INNERMOST_PARENS.subn(extract, query)
+            if not count:
+                break
+        segments.append(query)
+        
+        tables = set()
+        for segment in segments:
+            tables.update(cls._JOIN_TABLES.findall(segment))
+            for from_list in cls._FROM_LISTS.findall(segment):
+                for item in from_list.split(','):
+                    match = cls._FROM_ITEM.match(item)
+                    if match:
+                        tables.add(match.group(1))
+        tables.discard(cls._SUBQUERY)
+        return {table.lower() for table in tables}
+    
+    @classmethod
+    def tables_written(cls, query: str) -> set:
+        return {table.lower() for table in cls._WRITE_TABLES.findall(query)}
+    
+    def get(self, key: Tuple):
+        """
+        Returns:
+            (是否命中, 结果副本)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._copy(entry[2])
+    
+    def put(self, key: Tuple, query: str, result):
+        """缓存查询结果"""
+        tables = self.tables_read(query)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tables, self._copy(result))
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate(self, tables=None):
+        """使依赖指定表的缓存失效，tables为None时清空全部缓存"""
+        with self._lock:
+            if tables is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+                return
+            
+            for table in tables:
+                for key in list(self._by_table.get(table.lower(), ())):
+                    self._remove(key)
+                    self.invalidations += 1
+    
+    def stats(self) -> Dict:
+        """命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+            }
+    
+    def _remove(self, key: Tuple):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+    
+    @staticmethod
+    def _copy(result):
+        """复制结果，调用方修改返回值不会影响缓存"""
+        if isinstance(result, list):
+            return [dict(row) if isinstance(row, dict) else row for row in result]
+        if isinstance(result, dict):
+            return dict(result)
+        return result
+
 
 class MySqlHelper:
     """
@@ -13,7 +348,15 @@ class MySqlHelper:
                  user: str = 'root', 
                  password: str = None,
                  port: int = 3306,
-                 autocommit: bool = True):
+                 autocommit: bool = True,
+                 pool_size: int = None,
+                 pool_timeout: float = 10.0,
+                 health_check: bool = True,
+                 pool: ConnectionPool = None,
+                 prepared_statements: bool = False,
+                 statement_cache_size: int = 64,
+                 query_cache_size: int = None,
+                 query_cache_ttl: float = 60.0):
         """
         初始化数据库连接参数
         
@@ -24,6 +367,14 @@ class MySqlHelper:
             password: 密码
             port: 端口号
             autocommit: 是否自动提交事务
+            pool_size: 连接池大小，设置后启用连接池模式
+            pool_timeout: 从连接池借出连接的最长等待时间（秒）
+            health_check: 借出连接前是否检查连接可用性
+            pool: 共享的连接池，多个MySqlHelper可共用同一个池
+            prepared_statements: insert/update/delete是否复用服务端预处理语句
+            statement_cache_size: 每个连接缓存的预处理语句数
+            query_cache_size: 查询结果缓存的条目数，设置后fetch_all/fetch_one结果会被缓存
+            query_cache_ttl: 查询结果缓存的有效期（秒）
         """
         self.host = host
         self.database = database
@@ -33,6 +384,43 @@ class MySqlHelper:
         self.autocommit = autocommit
         self.connection = None
         self.cursor = None
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.health_check = health_check
+        self.pool = pool
+        self._owns_pool = False
+        self._local = threading.local()  # 保存事务中固定使用的连接
+        self._outer_transaction = None  # 调用方开启并负责提交的事务连接，所有线程共用
+        self._external_connection = False  # 连接由调用方传入（from_connection），没有自己的连接参数
+        self._max_allowed_packet = None
+        self.statement_cache = StatementCache(statement_cache_size) if prepared_statements else None
+        self.query_cache = QueryCache(query_cache_size, query_cache_ttl) if query_cache_size else None
+        self.last_bulk_stats = None
+    
+    @classmethod
+    def from_connection(cls, connection, autocommit: bool = None,
+                        in_transaction: bool = False) -> 'MySqlHelper':
+        """
+        用已打开的连接创建MySqlHelper（连接仍由调用方负责关闭）
+        
+        Args:
+            connection: mysql.connector连接
+            autocommit: 是否自动提交，默认沿用连接的设置
+            in_transaction: 连接处于调用方开启的事务中；此时helper的所有操作（包括
+                bulk_insert）都在该事务内执行，begin_transaction/commit/rollback不做任何操作，
+                由调用方提交或回滚
+        """
+        helper = cls(autocommit=connection.autocommit if autocommit is None else autocommit)
+        helper.connection = connection
+        helper._external_connection = True
+        if in_transaction:
+            helper._outer_transaction = connection
+        return helper
+    
+    @property
+    def pooled(self) -> bool:
+        """是否为连接池模式"""
+        return self.pool is not None or self.pool_size is not None
     
     def connect(self) -> bool:
         """
@@ -41,6 +429,9 @@ class MySqlHelper:
         Returns:
             bool: 连接是否成功
         """
+        if self.pooled:
+            return self._connect_pool()
+        
         try:
             self.connection = mysql.connector.connect(
                 host=self.host,
@@ -60,8 +451,41 @@ class MySqlHelper:
             print(f"数据库连接错误: {e}")
             return False
     
+    def _connect_pool(self) -> bool:
+        """创建连接池并借出一次连接验证可用性"""
+        try:
+            if self.pool is None:
+                self.pool = ConnectionPool(
+                    size=self.pool_size,
+                    timeout=self.pool_timeout,
+                    health_check=self.health_check,
+                    host=self.host,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password,
+                    port=self.port,
+                    autocommit=self.autocommit
+                )
+                self._owns_pool = True
+            
+            with self.pool.connection():
+                pass
+            print(f"成功连接到MySQL数据库: {self.database}（连接池大小: {self.pool.size}）")
+            return True
+            
+        except Error as e:
+            print(f"数据库连接错误: {e}")
+            return False
+    
     def disconnect(self):
         """断开数据库连接"""
+        if self.pooled:
+            # 共享的连接池由创建者负责关闭
+            if self.pool is not None and self._owns_pool:
+                self.pool.close()
+                print("MySQL连接池已关闭")
+            return
+        
         if self.connection and self.connection.is_connected():
             if self.cursor:
                 self.cursor.close()
@@ -80,52 +504,152 @@ class MySqlHelper:
             int: 受影响的行数，失败返回None
         """
         try:
-            self.cursor.execute(query, params or ())
-            if not self.autocommit:
-                self.connection.commit()
-            return self.cursor.rowcount
+            with self._cursor(commit=True) as cursor:
+                cursor.execute(query, params or ())
+                return cursor.rowcount
             
         except Error as e:
             print(f"执行查询错误: {e}")
-            if not self.autocommit:
-                self.connection.rollback()
             return None
+        finally:
+            # 无法识别写入的表时清空全部缓存
+            self._invalidate(QueryCache.tables_written(query) or None)
     
-    def fetch_all(self, query: str, params: Tuple = None) -> Optional[List[Dict]]:
+    def fetch_all(self, query: str, params: Tuple = None, cache: bool = True) -> Optional[List[Dict]]:
         """
         执行查询并返回所有结果
         
         Args:
             query: SQL查询语句
             params: 参数元组
+            cache: 开启查询缓存时是否使用缓存
             
         Returns:
             List[Dict]: 查询结果列表，失败返回None
         """
+        return self._cached_fetch('all', query, params, cache)
+    
+    def _cached_fetch(self, kind: str, query: str, params: Tuple, cache: bool):
+        """执行查询；开启查询缓存且不在事务中时先查缓存"""
+        use_cache = (cache and self.query_cache is not None
+                     and self._transaction_connection() is None)
+        if use_cache:
+            key = QueryCache.make_key(kind, query, params)
+            use_cache = key is not None
+        if use_cache:
+            hit, result = self.query_cache.get(key)
+            if hit:
+                return result
+        
         try:
-            self.cursor.execute(query, params or ())
-            return self.cursor.fetchall()
+            with self._cursor() as cursor:
+                cursor.execute(query, params or ())
+                result = cursor.fetchall() if kind == 'all' else cursor.fetchone()
         except Error as e:
             print(f"查询错误: {e}")
             return None
+        
+        if use_cache:
+            self.query_cache.put(key, query, result)
+        return result
     
-    def fetch_one(self, query: str, params: Tuple = None) -> Optional[Dict]:
+    def fetch_one(self, query: str, params: Tuple = None, cache: bool = True) -> Optional[Dict]:
         """
         执行查询并返回单条结果
         
         Args:
             query: SQL查询语句
             params: 参数元组
+            cache: 开启查询缓存时是否使用缓存
             
         Returns:
             Dict: 单条查询结果，失败返回None
         """
+        return self._cached_fetch('one', query, params, cache)
+    
+    def iter_rows(self, query: str, params: Tuple = None, batch_size: int = 1000,
+                  row_format: str = 'dict') -> Iterator[Any]:
+        """
+        流式读取大结果集（服务端游标，每次fetchmany一批），内存占用与结果集大小无关
+        
+        迭代期间会一直占用一个连接；出错时打印错误并抛出Error。
+        提前结束迭代（break、异常等）时不读完剩余结果：连接池借出的连接直接断开，由连接池换新连接；
+        其他连接用KILL QUERY终止查询。只有调用方传入的连接（from_connection）无法终止，仍需读完。
+        
+        Args:
+            query: SQL查询语句
+            params: 参数元组
+            batch_size: 每次从服务器读取的行数
+            row_format: 'dict'逐行返回字典，'tuple'逐行返回元组，
+                        'numpy'每批返回一个NumPy记录数组（字段名为列名）
+            
+        Returns:
+            Iterator: 行或记录数组的迭代器
+        """
+        if row_format not in ('dict', 'tuple', 'numpy'):
+            raise ValueError(f"不支持的row_format: {row_format}")
+        if row_format == 'numpy':
+            import numpy as np
+        
         try:
-            self.cursor.execute(query, params or ())
-            return self.cursor.fetchone()
+            with self._connection() as connection:
+                cursor = connection.cursor(dictionary=(row_format == 'dict'), buffered=False)
+                cursor.execute(query, params or ())
+                finished = False
+                try:
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            finished = True
+                            break
+                        
+                        if row_format == 'numpy':
+                            yield np.rec.fromrecords(rows, names=list(cursor.column_names))
+                        else:
+                            yield from rows
+                finally:
+                    if finished:
+                        cursor.close()
+                    else:
+                        self._abandon_stream(connection, cursor, batch_size)
+                        
         except Error as e:
-            print(f"查询错误: {e}")
-            return None
+            print(f"流式查询错误: {e}")
+            raise
+    
+    def _abandon_stream(self, connection, cursor, batch_size: int):
+        """提前结束流式查询，尽量不把剩余结果读回客户端"""
+        if self.pooled and self._transaction_connection() is None:
+            # 直接关闭socket，服务器发送失败后停止查询；归还时连接池发现连接已断开，会丢弃它
+            connection.shutdown()
+            return
+        
+        if not self._external_connection:
+            # 事务中的连接或单一连接不能断开，从另一个连接终止查询，剩下的只是已发出的少量数据
+            try:
+                self._kill_query(connection.connection_id)
+            except Error as e:
+                print(f"终止流式查询失败，读完剩余结果: {e}")
+        try:
+            while cursor.fetchmany(batch_size):
+                pass
+        except Error:
+            pass  # 被终止的查询以错误结束，连接仍可继续使用
+        cursor.close()
+    
+    def _kill_query(self, connection_id: int):
+        """用一个临时连接终止connection_id上正在执行的语句"""
+        if self.pool is not None:
+            connect_args = self.pool.connect_args
+        else:
+            connect_args = dict(host=self.host, user=self.user, password=self.password, port=self.port)
+        killer = mysql.connector.connect(**connect_args)
+        try:
+            cursor = killer.cursor()
+            cursor.execute("KILL QUERY %s", (connection_id,))
+            cursor.close()
+        finally:
+            killer.close()
     
     def insert(self, table: str, data: Dict) -> Optional[int]:
         """
@@ -139,54 +663,148 @@ class MySqlHelper:
             int: 插入的行ID，失败返回None
         """
         try:
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join(['%s'] * len(data))
-            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+            def build_query():
+                columns = ', '.join(data.keys())
+                placeholders = ', '.join(['%s'] * len(data))
+                return f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
             
-            self.cursor.execute(query, tuple(data.values()))
-            if not self.autocommit:
-                self.connection.commit()
-            
-            return self.cursor.lastrowid
+            key = ('insert', table) + tuple(data.keys())
+            with self._statement(key, build_query, commit=True) as (cursor, query):
+                cursor.execute(query, tuple(data.values()))
+                return cursor.lastrowid
             
         except Error as e:
             print(f"插入数据错误: {e}")
-            if not self.autocommit:
-                self.connection.rollback()
             return None
     
-    def insert_many(self, table: str, data_list: List[Dict]) -> Optional[int]:
+    def insert_many(self, table: str, data_list: List[Dict], chunk_size: int = 1000) -> Optional[int]:
         """
-        批量插入数据
+        批量插入数据（按块生成多行INSERT语句）
         
         Args:
             table: 表名
             data_list: 数据字典列表
+            chunk_size: 每条INSERT语句最多包含的行数
             
         Returns:
             int: 受影响的行数，失败返回None
         """
+        return self.bulk_insert(table, data_list, chunk_size=chunk_size)
+    
+    def bulk_insert(self, table: str, data_list: List[Dict], chunk_size: int = 1000,
+                    max_packet: int = None, report: bool = False,
+                    update_columns: List[str] = None) -> Optional[int]:
+        """
+        高速批量导入数据
+        
+        每块生成一条 INSERT ... VALUES (...),(...) 语句，单条语句的大小控制在
+        max_allowed_packet以内；每块在独立事务中提交（已在事务中时由外层事务统一提交）。
+        出错时回滚当前块并返回None，之前已提交的块保留。
+        
+        Args:
+            table: 表名
+            data_list: 数据字典列表，所有字典的字段需一致
+            chunk_size: 每条INSERT语句最多包含的行数
+            max_packet: 单条语句的字节上限，默认读取服务器的max_allowed_packet
+            report: 是否打印导入速度
+            update_columns: 唯一键冲突时要更新的字段，传入时生成 ON DUPLICATE KEY UPDATE 语句
+            
+        Returns:
+            int: 写入的行数，失败返回None
+        """
         if not data_list:
             return 0
-            
+        
+        started = time.perf_counter()
+        columns = list(data_list[0].keys())
+        row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        suffix = ''
+        if update_columns:
+            suffix = ' ON DUPLICATE KEY UPDATE ' + ', '.join(
+                f"{column} = VALUES({column})" for column in update_columns
+            )
+        
+        if max_packet is None:
+            max_packet = self._get_max_allowed_packet()
+        # 转义可能让数据变长，只使用一半的包大小作为预算
+        budget = max_packet // 2 - len(prefix) - len(suffix)
+        
+        in_transaction = self.in_transaction
+        total = 0
+        chunks = 0
+        
         try:
-            columns = ', '.join(data_list[0].keys())
-            placeholders = ', '.join(['%s'] * len(data_list[0]))
-            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-            
-            values = [tuple(data.values()) for data in data_list]
-            self.cursor.executemany(query, values)
-            
-            if not self.autocommit:
-                self.connection.commit()
+            for rows in self._chunk_rows(data_list, columns, chunk_size, budget):
+                query = prefix + ', '.join([row_placeholder] * len(rows)) + suffix
+                params = tuple(value for row in rows for value in row)
+                
+                if not in_transaction:
+                    self.begin_transaction()
+                try:
+                    with self._cursor() as cursor:
+                        cursor.execute(query, params)
+                except Exception:
+                    if not in_transaction:
+                        self.rollback()
+                    raise
+                # commit()失败时也会结束事务并归还连接，不能再回滚
+                if not in_transaction:
+                    self.commit()
+                
+                total += len(rows)
+                chunks += 1
                 
-            return self.cursor.rowcount
-            
         except Error as e:
-            print(f"批量插入错误: {e}")
-            if not self.autocommit:
-                self.connection.rollback()
+            print(f"批量导入错误（已导入 {total} 行）: {e}")
             return None
+        finally:
+            self._invalidate([table])
+        
+        elapsed = time.perf_counter() - started
+        self.last_bulk_stats = {
+            'rows': total,
+            'chunks': chunks,
+            'seconds': elapsed,
+            'rows_per_sec': total / elapsed if elapsed > 0 else float('inf'),
+        }
+        if report:
+            print(f"批量导入 {table}: {total} 行，{chunks} 批，"
+                  f"用时 {elapsed:.3f} 秒（{self.last_bulk_stats['rows_per_sec']:.0f} 行/秒）")
+        
+        return total
+    
+    @staticmethod
+    def _chunk_rows(data_list: List[Dict], columns: List[str], chunk_size: int, budget: int):
+        """按行数和估算的语句大小切分数据"""
+        rows = []
+        size = 0
+        for data in data_list:
+            row = tuple(data[column] for column in columns)
+            # 估算每个值在SQL文本中的长度（含引号和分隔符）
+            row_size = sum(len(str(value).encode('utf-8')) + 4 for value in row) + 4
+            
+            if rows and (len(rows) >= chunk_size or size + row_size > budget):
+                yield rows
+                rows = []
+                size = 0
+            
+            rows.append(row)
+            size += row_size
+        
+        if rows:
+            yield rows
+    
+    def _get_max_allowed_packet(self) -> int:
+        """读取并缓存服务器的max_allowed_packet，失败时按4MB计算"""
+        if self._max_allowed_packet is None:
+            try:
+                with self._cursor() as cursor:
+                    cursor.execute("SELECT @@max_allowed_packet AS max_allowed_packet")
+                    self._max_allowed_packet = int(cursor.fetchone()['max_allowed_packet'])
+            except Error:
+                return 4 * 1024 * 1024
+        return self._max_allowed_packet
     
     def update(self, table: str, data: Dict, condition: str, condition_params: Tuple = None) -> Optional[int]:
         """
@@ -202,21 +820,18 @@ class MySqlHelper:
             int: 受影响的行数，失败返回None
         """
         try:
-            set_clause = ', '.join([f"{key} = %s" for key in data.keys()])
-            query = f"UPDATE {table} SET {set_clause} WHERE {condition}"
+            def build_query():
+                set_clause = ', '.join([f"{key} = %s" for key in data.keys()])
+                return f"UPDATE {table} SET {set_clause} WHERE {condition}"
             
             params = tuple(data.values()) + (condition_params or ())
-            self.cursor.execute(query, params)
-            
-            if not self.autocommit:
-                self.connection.commit()
-                
-            return self.cursor.rowcount
+            key = ('update', table, condition) + tuple(data.keys())
+            with self._statement(key, build_query, commit=True) as (cursor, query):
+                cursor.execute(query, params)
+                return cursor.rowcount
             
         except Error as e:
             print(f"更新数据错误: {e}")
-            if not self.autocommit:
-                self.connection.rollback()
             return None
     
     def delete(self, table: str, condition: str, params: Tuple = None) -> Optional[int]:
@@ -232,39 +847,170 @@ class MySqlHelper:
             int: 受影响的行数，失败返回None
         """
         try:
-            query = f"DELETE FROM {table} WHERE {condition}"
-            self.cursor.execute(query, params or ())
-            
-            if not self.autocommit:
-                self.connection.commit()
-                
-            return self.cursor.rowcount
+            build_query = lambda: f"DELETE FROM {table} WHERE {condition}"
+            with self._statement(('delete', table, condition), build_query, commit=True) as (cursor, query):
+                cursor.execute(query, params or ())
+                return cursor.rowcount
             
         except Error as e:
             print(f"删除数据错误: {e}")
-            if not self.autocommit:
-                self.connection.rollback()
             return None
     
+    @property
+    def in_transaction(self) -> bool:
+        """当前线程是否处于begin_transaction()开启的事务中"""
+        return self._transaction_connection() is not None
+    
+    def _transaction_connection(self):
+        """当前线程的事务连接：begin_transaction()开启的或调用方的事务，不在事务中时为None"""
+        return getattr(self._local, 'connection', None) or self._outer_transaction
+    
     def begin_transaction(self):
-        """开始事务"""
-        self.connection.autocommit = False
+        """开始事务（连接池模式下当前线程会固定使用一个连接直到提交或回滚）"""
+        if self._outer_transaction is not None:
+            return
+        connection = self.pool.get_connection() if self.pooled else self.connection
+        connection.autocommit = False
+        self._local.connection = connection
     
     def commit(self):
-        """提交事务"""
-        self.connection.commit()
-        self.connection.autocommit = True
+        """提交事务，连接池模式下没有进行中的事务时不做任何操作（调用方的事务由调用方提交）"""
+        if self._outer_transaction is not None:
+            return
+        connection = self._end_transaction()
+        if connection is None:
+            return
+        try:
+            connection.commit()
+        finally:
+            self._release_transaction(connection)
     
     def rollback(self):
-        """回滚事务"""
-        self.connection.rollback()
-        self.connection.autocommit = True
+        """回滚事务，连接池模式下没有进行中的事务时不做任何操作（调用方的事务由调用方回滚）"""
+        if self._outer_transaction is not None:
+            return
+        connection = self._end_transaction()
+        if connection is None:
+            return
+        try:
+            connection.rollback()
+        finally:
+            self._release_transaction(connection)
+    
+    def _end_transaction(self):
+        """取出当前线程的事务连接"""
+        connection = getattr(self._local, 'connection', None) or self.connection
+        self._local.connection = None
+        return connection
+    
+    def _release_transaction(self, connection):
+        """恢复自动提交设置，连接池模式下归还连接"""
+        connection.autocommit = self.autocommit
+        if self.pooled:
+            self.pool.release(connection)
+        
+        # 事务期间其他线程可能缓存了提交前的数据，结束时再失效一次
+        written = getattr(self._local, 'written_tables', None)
+        self._local.written_tables = None
+        if written:
+            self._invalidate(None if None in written else written)
+    
+    def _invalidate(self, tables):
+        """
+        使查询缓存中依赖这些表的结果失效
+        
+        Args:
+            tables: 表名列表，None表示清空全部缓存
+        """
+        if self.query_cache is None:
+            return
+        self.query_cache.invalidate(tables)
+        
+        if self._transaction_connection() is not None:
+            written = getattr(self._local, 'written_tables', None)
+            if written is None:
+                written = self._local.written_tables = set()
+            written.update(tables if tables is not None else [None])
+    
+    def query_cache_stats(self) -> Optional[Dict]:
+        """查询缓存的命中统计，未开启时返回None"""
+        return self.query_cache.stats() if self.query_cache is not None else None
+    
+    @contextmanager
+    def _connection(self, commit: bool = False):
+        """
+        取得当前操作使用的连接：事务中的固定连接、连接池借出的连接或单一连接
+        
+        Args:
+            commit: 非自动提交模式下，是否在成功后提交（出错时回滚）
+        """
+        transaction = self._transaction_connection()
+        if transaction is not None:
+            connection = transaction
+        elif self.pooled:
+            connection = self.pool.get_connection()
+        else:
+            connection = self.connection
+        
+        # 事务中由commit()/rollback()统一提交
+        manage = commit and transaction is None and not self.autocommit
+        
+        try:
+            yield connection
+            if manage:
+                connection.commit()
+        except Error:
+            if manage:
+                connection.rollback()
+            raise
+        finally:
+            if transaction is None and self.pooled:
+                self.pool.release(connection)
+    
+    @contextmanager
+    def _cursor(self, commit: bool = False, **cursor_args):
+        """
+        借出连接并创建一个新游标，用完后关闭游标并归还连接
+        
+        Args:
+            commit: 非自动提交模式下，是否在成功后提交（出错时回滚）
+            cursor_args: 传给connection.cursor的参数，默认返回字典格式的结果
+        """
+        cursor_args.setdefault('dictionary', True)
+        with self._connection(commit) as connection:
+            cursor = connection.cursor(**cursor_args)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def _statement(self, key: Tuple, build_query, commit: bool = False):
+        """
+        取得执行写操作的(游标, SQL)：开启预处理语句缓存时复用缓存的预处理游标，
+        否则生成SQL并使用新游标
+        """
+        try:
+            if self.statement_cache is None:
+                with self._cursor(commit) as cursor:
+                    yield cursor, build_query()
+            else:
+                with self._connection(commit) as connection:
+                    yield self.statement_cache.get(connection, key, build_query)
+        finally:
+            # key[1]为表名，写入(提交)后使相关查询缓存失效
+            self._invalidate([key[1]])
+    
+    def statement_cache_stats(self) -> Optional[Dict]:
+        """预处理语句缓存的命中统计，未开启时返回None"""
+        return self.statement_cache.stats() if self.statement_cache is not None else None
     
     def get_table_list(self) -> Optional[List[str]]:
         """获取所有表名"""
         try:
-            self.cursor.execute("SHOW TABLES")
-            tables = self.cursor.fetchall()
+            with self._cursor() as cursor:
+                cursor.execute("SHOW TABLES")
+                tables = cursor.fetchall()
             return [table[f'Tables_in_{self.database}'] for table in tables]
         except Error as e:
             print(f"获取表列表错误: {e}")
@@ -273,8 +1019,9 @@ class MySqlHelper:
     def get_table_schema(self, table: str) -> Optional[List[Dict]]:
         """获取表结构"""
         try:
-            self.cursor.execute(f"DESCRIBE {table}")
-            return self.cursor.fetchall()
+            with self._cursor() as cursor:
+                cursor.execute(f"DESCRIBE {table}")
+                return cursor.fetchall()
         except Error as e:
             print(f"获取表结构错误: {e}")
             return None
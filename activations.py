@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class Activation:
+    """Element-wise activation function
+    
+    forward() and derivative() write into out when it is given (out may be
+    the input array itself), so training can reuse preallocated buffers.
+    derivative() takes the activation's output y rather than its input.
+    """
+    
+    name = None
+    
+    # True when the output layer error (targets - outputs) already is the
+    # delta, as for softmax with cross-entropy loss
+    cross_entropy = False
+    
+    def forward(self, x, out=None):
+        raise NotImplementedError
+    
+    def derivative(self, y, out=None):
+        raise NotImplementedError
+    
+    def loss(self, outputs, targets):
+        """Mean squared error"""
+        return np.mean((targets - outputs) ** 2)
+
+
+class Sigmoid(Activation):
+    name = 'sigmoid'
+    
+    def forward(self, x, out=None):
+        # 1 / (1 + exp(-x)) written as 0.5 * (1 + tanh(x / 2)), which cannot
+        # overflow and needs no temporaries
+        out = np.multiply(x, 0.5, out=out)
+        np.tanh(out, out=out)
+        out += 1.0
+        out *= 0.5
+        return out
+    
+    def derivative(self, y, out=None):
+        out = np.subtract(1.0, y, out=out)
+        out *= y
+        return out
+
+
+class Tanh(Activation):
+    name = 'tanh'
+    
+    def forward(self, x, out=None):
+        return np.tanh(x, out=out)
+    
+    def derivative(self, y, out=None):
+        out = np.multiply(y, y, out=out)
+        np.subtract(1.0, out, out=out)
+        return out
+
+
+class ReLU(Activation):
+    name = 'relu'
+    
+    def forward(self, x, out=None):
+        return np.maximum(x, 0.0, out=out)
+    
+    def derivative(self, y, out=None):
+        # Outputs are never negative, so their sign is the 0/1 derivative
+        return np.sign(y, out=out)
+
+
+class Softmax(Activation):
+    """Softmax over each row, trained with cross-entropy loss (output layer only)"""
+    
+    name = 'softmax'
+    cross_entropy = True
+    
+    def forward(self, x, out=None):
+        # Subtract each row's maximum so exp() cannot overflow
+        out = np.subtract(x, np.max(x, axis=-1, keepdims=True), out=out)
+        np.exp(out, out=out)
+        out /= np.sum(out, axis=-1, keepdims=True)
+        return out
+    
+    def derivative(self, y, out=None):
+        # With cross-entropy loss the output delta is the error itself
+        if out is None:
+            return np.ones_like(y)
+        out.fill(1.0)
+        return out
+    
+    def loss(self, outputs, targets):
+        """Mean cross-entropy"""
+        eps = np.finfo(outputs.dtype).tiny
+        return -np.mean(np.sum(targets * np.log(np.maximum(outputs, eps)), axis=-1))
+
+
+ACTIVATIONS = {
+    activation.name: activation
+    for activation in (Sigmoid, Tanh, ReLU, Softmax)
+}
+
+
+def get_activation(activation):
+    """Return an Activation for a name such as 'relu' (instances pass through)"""
+    if isinstance(activation, Activation):
+        return activation
+    try:
+        return ACTIVATIONS[activation]()
+    except KeyError:
+        raise ValueError(f"unknown activation {activation!r}, expected one of {sorted(ACTIVATIONS)}")
@@ -1,9 +1,138 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
+from data_loader import MNISTDataLoader
+from neural_network import NeuralNetwork
+from MySqlHelper import MySqlHelper
+from DashboardRollups import DashboardRollups
+
 app = Flask(__name__)
 CORS(app)
 
+MODEL_PATH = os.environ.get('MODEL_PATH', 'checkpoints/mnist_nn')
+
+# Dashboard database (tables from "week5 SQL.sql")
+DB_CONFIG = {
+    'host': os.environ.get('MYSQL_HOST', 'localhost'),
+    'port': int(os.environ.get('MYSQL_PORT', 3306)),
+    'user': os.environ.get('MYSQL_USER', 'root'),
+    'password': os.environ.get('MYSQL_PASSWORD'),
+    'database': os.environ.get('MYSQL_DATABASE', 'visualization_db'),
+}
+# The rollups only change when they are refreshed, and a refresh invalidates
+# their cached queries, so dashboard queries are cached for one interval
+DASHBOARD_REFRESH_INTERVAL = float(os.environ.get('DASHBOARD_REFRESH_INTERVAL', 30))
+
+
+class MicroBatcher:
+    """Collect concurrent prediction requests into small batches
+    
+    Each request waits at most max_wait seconds for others to join its batch,
+    then the whole batch is scored with one forward pass.
+    """
+    
+    def __init__(self, network, max_batch_size=64, max_wait=0.005):
+        self.network = network
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+    
+    def predict(self, inputs):
+        """Score a (samples, input_nodes) array, blocking until its batch has run"""
+        future = Future()
+        self.requests.put((inputs, future))
+        return future.result()
+    
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or the window closes"""
+        pending = [self.requests.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        
+        return pending
+    
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                outputs = self.network.predict_proba(np.concatenate([inputs for inputs, _ in pending]))
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            
+            # Hand each request back its own slice of the batch
+            start = 0
+            for inputs, future in pending:
+                future.set_result(outputs[start:start + len(inputs)])
+                start += len(inputs)
+
+
+def load_model(path):
+    """Load the checkpointed network, or None if it has not been trained yet"""
+    if not NeuralNetwork.checkpoint_exists(path):
+        print(f"No model checkpoint at {path}; /api/predict is disabled")
+        return None
+    return NeuralNetwork.load(path)
+
+
+model = load_model(MODEL_PATH)
+batcher = MicroBatcher(model) if model is not None else None
+
+_dashboard = None
+_dashboard_lock = threading.Lock()
+
+
+def get_dashboard():
+    """Connect to the dashboard database on first use
+    
+    The rollups are brought up to date once here and then refreshed by a
+    background thread, never in the request path.
+    """
+    global _dashboard
+    with _dashboard_lock:
+        if _dashboard is None:
+            db = MySqlHelper(**DB_CONFIG, pool_size=8, query_cache_size=64,
+                             query_cache_ttl=DASHBOARD_REFRESH_INTERVAL)
+            if not db.connect():
+                return None
+            rollups = DashboardRollups(db, refresh_interval=DASHBOARD_REFRESH_INTERVAL)
+            if not rollups.ensure_tables():
+                return None
+            rollups.refresh()
+            rollups.start()
+            _dashboard = rollups
+    return _dashboard
+
+
+def dashboard_response(query):
+    """Run one dashboard aggregation and return it as JSON"""
+    dashboard = get_dashboard()
+    if dashboard is None:
+        return jsonify({"error": "Dashboard database is unavailable"}), 503
+    return jsonify(query(dashboard))
+
 @app.route('/')
 def home():
     return jsonify({"message": "Flask backend is running"})
@@ -37,5 +166,53 @@ def post_message():
         "received_url_param": url_param
     })
 
+# Digit recognition with the checkpointed NeuralNetwork
+@app.route('/api/predict', methods=['POST'])
+def predict():
+    if batcher is None:
+        return jsonify({"error": "Model is not loaded"}), 503
+    
+    # Accept {"image": [784 pixels]} or {"images": [[784 pixels], ...]}
+    # with raw 0-255 pixel values
+    body_data = request.get_json(silent=True) or {}
+    if 'images' in body_data:
+        images = body_data['images']
+    elif 'image' in body_data:
+        images = [body_data['image']]
+    else:
+        return jsonify({"error": "Request body must contain 'image' or 'images'"}), 400
+    
+    try:
+        images = np.array(images, dtype=np.float32, ndmin=2)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Images must be lists of numbers"}), 400
+    if images.ndim != 2 or images.shape[1] != model.input_nodes or len(images) == 0:
+        return jsonify({"error": f"Each image must have {model.input_nodes} pixels"}), 400
+    
+    outputs = batcher.predict(MNISTDataLoader.normalize_batch(images))
+    
+    return jsonify({
+        "predictions": np.argmax(outputs, axis=1).tolist(),
+        "probabilities": outputs.tolist()
+    })
+
+# Dashboard endpoints used by the React components, served from daily rollups
+@app.route('/api/sales-data', methods=['GET'])
+def sales_data():
+    return dashboard_response(lambda dashboard: dashboard.sales_by_category_region())
+
+@app.route('/api/sales-trend', methods=['GET'])
+def sales_trend():
+    return dashboard_response(lambda dashboard: dashboard.sales_trend())
+
+@app.route('/api/product-ranking', methods=['GET'])
+def product_ranking():
+    limit = request.args.get('limit', 10, type=int)
+    return dashboard_response(lambda dashboard: dashboard.product_ranking(limit))
+
+@app.route('/api/user-behavior', methods=['GET'])
+def user_behavior():
+    return dashboard_response(lambda dashboard: dashboard.user_behavior())
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
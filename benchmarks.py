@@ -0,0 +1,238 @@
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from activations import ACTIVATIONS
+from main import create_synthetic_data
+from neural_network import NeuralNetwork
+from optimizers import SGD, Adam, CosineDecay, Warmup
+
+
+def compare_precision(train_set=None, test_set=None, hidden_nodes=200, epochs=5,
+                      batch_size=64, learning_rate=0.3, seed=0, dtypes=(np.float64, np.float32)):
+    """Train identically seeded networks in each dtype and compare speed and accuracy
+    
+    Every network starts from the same weights and sees the same batches, so
+    differences come from precision alone. Uses synthetic digits unless
+    datasets are given.
+    """
+    if train_set is None:
+        train_set, test_set = create_synthetic_data(2000, seed=seed).split(test_fraction=0.2, seed=seed)
+    
+    results = {}
+    for dtype in dtypes:
+        np.random.seed(seed)
+        network = NeuralNetwork(784, hidden_nodes, 10, learning_rate, dtype)
+        
+        seconds = 0.0
+        for epoch in range(epochs):
+            np.random.seed(seed + epoch)
+            start = time.perf_counter()
+            network.fit(train_set, batch_size=batch_size)
+            seconds += time.perf_counter() - start
+        
+        results[np.dtype(dtype).name] = {
+            'seconds': seconds,
+            'samples_per_sec': epochs * len(train_set) / seconds,
+            'accuracy': float(network.calculate_accuracy(test_set)),
+        }
+    return results
+
+
+def print_precision_comparison(**kwargs):
+    """Print compare_precision() results relative to float64"""
+    results = compare_precision(**kwargs)
+    baseline = results.get('float64')
+    for name, result in results.items():
+        line = (f"{name:>8}: {result['samples_per_sec']:9.0f} samples/s, "
+                f"accuracy {result['accuracy']:.4f}")
+        if baseline and name != 'float64':
+            line += (f"  ({result['samples_per_sec'] / baseline['samples_per_sec']:.2f}x throughput, "
+                     f"accuracy {result['accuracy'] - baseline['accuracy']:+.4f})")
+        print(line)
+
+
+def compare_architectures(train_set=None, test_set=None, architectures=None, epochs=5,
+                          batch_size=32, dtype=np.float32, seed=0):
+    """Train several layer stacks and report test accuracy against training time
+    
+    architectures maps a label to NeuralNetwork keyword arguments (without
+    input_nodes/output_nodes). Each result records the accuracy after every
+    epoch and the cumulative training seconds at that point.
+    """
+    if train_set is None:
+        train_set, test_set = create_synthetic_data(3000, seed=seed).split(test_fraction=0.2, seed=seed)
+    if architectures is None:
+        architectures = {
+            '784-100-10': dict(hidden_nodes=100, learning_rate=0.3),
+            # The deeper sigmoid stack gets the exact gradient, which is damped by
+            # the output sigmoid's derivative, so it needs a larger learning rate
+            '784-200-100-10': dict(hidden_nodes=(200, 100), learning_rate=1.0),
+            '784-200-100-10 tanh/softmax, bias': dict(hidden_nodes=(200, 100), learning_rate=0.05,
+                                                      hidden_activation='tanh',
+                                                      output_activation='softmax', bias=True),
+        }
+    
+    results = {}
+    for label, kwargs in architectures.items():
+        np.random.seed(seed)
+        network = NeuralNetwork(784, output_nodes=10, dtype=dtype, **kwargs)
+        seconds = 0.0
+        history = []
+        for epoch in range(epochs):
+            np.random.seed(seed + epoch)
+            start = time.perf_counter()
+            network.fit(train_set, batch_size=batch_size)
+            seconds += time.perf_counter() - start
+            history.append((seconds, float(network.calculate_accuracy(test_set))))
+        results[label] = history
+    return results
+
+
+def print_architecture_comparison(**kwargs):
+    """Print compare_architectures() results, one line per epoch"""
+    for label, history in compare_architectures(**kwargs).items():
+        print(label)
+        for epoch, (seconds, accuracy) in enumerate(history, 1):
+            print(f"  epoch {epoch}: accuracy {accuracy:.4f} after {seconds:.2f}s")
+
+
+def compare_optimizers(train_set=None, test_set=None, optimizers=None, hidden_nodes=100, epochs=10,
+                       batch_size=10, target_loss=1e-3, dtype=np.float32, seed=0):
+    """Train identically seeded networks with each optimizer and compare convergence
+    
+    optimizers maps a label to a function taking the number of steps per
+    epoch and returning an optimizer. Reports the epoch and training seconds
+    at which the test loss first drops to target_loss (None if it never
+    does), plus the final loss and accuracy.
+    """
+    if train_set is None:
+        train_set, test_set = create_synthetic_data(1200, seed=seed).split(test_fraction=0.2, seed=seed)
+    if optimizers is None:
+        optimizers = {
+            'sgd 0.3': lambda steps: SGD(0.3),
+            'nesterov 0.1': lambda steps: SGD(0.1, momentum=0.9, nesterov=True),
+            'nesterov 0.1 warmup+cosine': lambda steps: SGD(
+                0.1, momentum=0.9, nesterov=True,
+                schedule=Warmup(steps, CosineDecay((epochs - 1) * steps, min_factor=0.05))),
+            'adam 0.003': lambda steps: Adam(0.003),
+        }
+    
+    test_inputs = test_set.inputs(dtype=dtype)
+    test_targets = test_set.targets(num_classes=10, dtype=dtype)
+    steps_per_epoch = -(-len(train_set) // batch_size)
+    
+    results = {}
+    for label, make_optimizer in optimizers.items():
+        np.random.seed(seed)
+        network = NeuralNetwork(784, hidden_nodes, 10, 0.3, dtype, optimizer=make_optimizer(steps_per_epoch))
+        seconds = 0.0
+        result = {'target_epoch': None, 'target_seconds': None}
+        for epoch in range(epochs):
+            np.random.seed(seed + epoch)
+            start = time.perf_counter()
+            network.fit(train_set, batch_size=batch_size)
+            seconds += time.perf_counter() - start
+            loss = float(network.calculate_loss(network.predict_proba(test_inputs), test_targets))
+            if result['target_epoch'] is None and loss <= target_loss:
+                result['target_epoch'], result['target_seconds'] = epoch, seconds
+        result['loss'] = loss
+        result['accuracy'] = float(network.calculate_accuracy(test_set))
+        result['seconds'] = seconds
+        results[label] = result
+    return results
+
+
+def print_optimizer_comparison(**kwargs):
+    """Print compare_optimizers() results"""
+    target_loss = kwargs.get('target_loss', 1e-3)
+    for label, result in compare_optimizers(**kwargs).items():
+        if result['target_epoch'] is None:
+            reached = f"loss {target_loss:g} not reached"
+        else:
+            reached = f"loss {target_loss:g} at epoch {result['target_epoch']} ({result['target_seconds']:.2f}s)"
+        print(f"{label:>28}: {reached}, final loss {result['loss']:.5f}, "
+              f"accuracy {result['accuracy']:.4f}, {result['seconds']:.2f}s total")
+
+
+def _legacy_train_batch(network, inputs, targets):
+    """train_batch before activations were pluggable, kept for comparison"""
+    sigmoid = lambda x: 1 / (1 + np.exp(-x))
+    hidden_outputs = sigmoid(np.dot(inputs, network.weights_input_hidden.T))
+    final_outputs = sigmoid(np.dot(hidden_outputs, network.weights_hidden_output.T))
+    
+    output_errors = targets - final_outputs
+    hidden_errors = np.dot(output_errors, network.weights_hidden_output)
+    output_deltas = output_errors * final_outputs * (1.0 - final_outputs)
+    hidden_deltas = hidden_errors * hidden_outputs * (1.0 - hidden_outputs)
+    
+    scale = network.learning_rate / inputs.shape[0]
+    network.weights_hidden_output += scale * np.dot(output_deltas.T, hidden_outputs)
+    network.weights_input_hidden += scale * np.dot(hidden_deltas.T, inputs)
+
+
+def _measure(step, repeat):
+    """Return (seconds per call, peak bytes allocated during one call)"""
+    # The first call allocates any reusable buffers
+    step()
+    
+    start = time.perf_counter()
+    for _ in range(repeat):
+        step()
+    seconds = (time.perf_counter() - start) / repeat
+    
+    tracemalloc.start()
+    step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def benchmark_activations(batch_size=64, hidden_nodes=200, repeat=500, dtype=np.float32, seed=0):
+    """Time and measure temporary memory of activation kernels and a training step
+    
+    Compares the old sigmoid lambda and train_batch with the in-place
+    Activation kernels and workspace-based train_batch.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((batch_size, hidden_nodes)).astype(dtype)
+    out = np.empty_like(x)
+    results = {}
+    
+    legacy_sigmoid = lambda x: 1 / (1 + np.exp(-x))
+    results['sigmoid lambda'] = _measure(lambda: legacy_sigmoid(x), repeat)
+    results['sigmoid derivative y*(1-y)'] = _measure(lambda: x * (1.0 - x), repeat)
+    for name, activation_class in ACTIVATIONS.items():
+        activation = activation_class()
+        results[f"{name}.forward(out=)"] = _measure(lambda: activation.forward(x, out=out), repeat)
+        results[f"{name}.derivative(out=)"] = _measure(lambda: activation.derivative(x, out=out), repeat)
+    
+    inputs = rng.random((batch_size, 784)).astype(dtype)
+    targets = np.eye(10, dtype=dtype)[rng.integers(0, 10, batch_size)]
+    np.random.seed(seed)
+    network = NeuralNetwork(784, hidden_nodes, 10, 0.3, dtype)
+    results['train_batch (old)'] = _measure(lambda: _legacy_train_batch(network, inputs, targets), repeat)
+    results['train_batch'] = _measure(lambda: network.train_batch(inputs, targets), repeat)
+    
+    return results
+
+
+def print_activation_benchmark(**kwargs):
+    """Print benchmark_activations() results"""
+    for label, (seconds, peak) in benchmark_activations(**kwargs).items():
+        print(f"{label:>28}: {seconds * 1e6:9.1f} us/call, {peak / 1024:8.1f} KiB allocated")
+
+
+if __name__ == "__main__":
+    benchmarks = {
+        'precision': print_precision_comparison,
+        'activations': print_activation_benchmark,
+        'architectures': print_architecture_comparison,
+        'optimizers': print_optimizer_comparison,
+    }
+    names = sys.argv[1:] or list(benchmarks)
+    for name in names:
+        print(f"== {name} ==")
+        benchmarks[name]()
@@ -1,21 +1,61 @@
 import numpy as np
+import os
+import queue
 import struct
+import threading
 
 class MNISTDataLoader:
+    # IDX type codes (third byte of the magic number) mapped to numpy dtypes
+    IDX_DTYPES = {
+        0x08: np.uint8,
+        0x09: np.int8,
+        0x0B: np.dtype('>i2'),
+        0x0C: np.dtype('>i4'),
+        0x0D: np.dtype('>f4'),
+        0x0E: np.dtype('>f8'),
+    }
+    
     def __init__(self):
         pass
     
+    def read_idx(self, path, expected_ndim=None):
+        """Memory-map an IDX file and return a read-only array view of its data"""
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+            if len(magic) != 4:
+                raise ValueError(f"{path}: truncated IDX header")
+            zero, type_code, ndim = struct.unpack(">HBB", magic)
+            if zero != 0 or type_code not in self.IDX_DTYPES:
+                raise ValueError(f"{path}: invalid IDX magic number")
+            if expected_ndim is not None and ndim != expected_ndim:
+                raise ValueError(f"{path}: expected {expected_ndim} dimensions, found {ndim}")
+            header = f.read(4 * ndim)
+            if len(header) != 4 * ndim:
+                raise ValueError(f"{path}: truncated IDX header")
+            shape = struct.unpack(">" + "I" * ndim, header)
+        
+        dtype = np.dtype(self.IDX_DTYPES[type_code])
+        offset = 4 + 4 * ndim
+        expected_size = offset + int(np.prod(shape)) * dtype.itemsize
+        actual_size = os.path.getsize(path)
+        if actual_size < expected_size:
+            raise ValueError(f"{path}: header declares {expected_size} bytes, file has {actual_size}")
+        
+        return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+    
     def load_data(self, images_path, labels_path, max_samples=None):
-        """Load MNIST dataset from binary files"""
+        """Load MNIST dataset from binary files (uint8 views, no copy)"""
         # Load labels
-        with open(labels_path, 'rb') as f:
-            magic, num = struct.unpack(">II", f.read(8))
-            labels = np.fromfile(f, dtype=np.uint8)
+        labels = self.read_idx(labels_path, expected_ndim=1)
         
         # Load images
-        with open(images_path, 'rb') as f:
-            magic, num, rows, cols = struct.unpack(">IIII", f.read(16))
-            images = np.fromfile(f, dtype=np.uint8).reshape(len(labels), rows * cols)
+        images = self.read_idx(images_path, expected_ndim=3)
+        num, rows, cols = images.shape
+        if num != len(labels):
+            raise ValueError(f"{images_path} has {num} images but {labels_path} has {len(labels)} labels")
+        images = images.reshape(num, rows * cols)
+        if images.dtype != np.uint8 or labels.dtype != np.uint8:
+            raise ValueError("MNIST images and labels must be stored as unsigned bytes")
         
         # Limit number of samples for faster training
         if max_samples:
@@ -28,24 +68,148 @@ class MNISTDataLoader:
         """Normalize data to range 0.01-1.00"""
         return data / 255.0 * 0.99 + 0.01
     
-    def create_targets(self, labels, num_classes=10):
+    @staticmethod
+    def normalize_batch(images, indices=None, dtype=np.float32):
+        """Gather rows from (memory-mapped) images and normalize only those"""
+        batch = images if indices is None else images[indices]
+        out = np.array(batch, dtype=dtype)
+        out *= 0.99 / 255.0
+        out += 0.01
+        return out
+    
+    @staticmethod
+    def create_targets(labels, num_classes=10, dtype=np.float64):
         """Create target output matrix (one-hot encoding)"""
-        targets = np.zeros((len(labels), num_classes)) + 0.01
-        for i, label in enumerate(labels):
-            targets[i, label] = 0.99
+        targets = np.zeros((len(labels), num_classes), dtype=dtype) + 0.01
+        targets[np.arange(len(labels)), labels] = 0.99
         return targets
     
     def prepare_training_data(self, images, labels):
         """Prepare training data in required format"""
-        # Normalize image data
-        normalized_images = self.normalize_data(images)
+        # Images stay as uint8 and are normalized when a batch is requested
+        return Dataset(images, labels)
+    
+    def make_batch(self, images, labels, indices, num_classes=10, normalize=True, dtype=np.float32):
+        """Gather a contiguous batch of inputs and one-hot targets"""
+        if normalize:
+            inputs = self.normalize_batch(images, indices, dtype)
+        else:
+            inputs = np.array(images[indices], dtype=dtype)
         
-        # Create target outputs
-        targets = self.create_targets(labels)
+        targets = self.create_targets(labels[indices], num_classes, dtype=dtype)
+        return inputs, targets
+    
+    def batch_generator(self, images, labels, batch_size=32, shuffle=True,
+                        prefetch=False, num_classes=10, normalize=None, dtype=np.float32):
+        """Yield (inputs, targets) mini-batches for one epoch
+        
+        Raw uint8 images are normalized per batch; set prefetch=True to build
+        the next batch on a background thread while the current one trains.
+        """
+        if normalize is None:
+            normalize = images.dtype == np.uint8
+        labels = np.asarray(labels)
+        
+        num_samples = len(labels)
+        order = np.random.permutation(num_samples) if shuffle else np.arange(num_samples)
+        
+        def batches():
+            for start in range(0, num_samples, batch_size):
+                # Sorted indices keep memory-mapped reads sequential
+                indices = np.sort(order[start:start + batch_size])
+                yield self.make_batch(images, labels, indices, num_classes, normalize, dtype)
+        
+        if not prefetch:
+            yield from batches()
+            return
+        
+        yield from self._prefetch(batches())
+    
+    def _prefetch(self, iterator, depth=1):
+        """Run an iterator on a background thread, keeping depth items ready"""
+        buffer = queue.Queue(maxsize=depth)
+        stop = threading.Event()
+        done = object()
         
-        # Combine data into training format
-        training_data = []
-        for i in range(len(labels)):
-            training_data.append(np.concatenate(([labels[i]], normalized_images[i])))
+        def put(item):
+            # Give up once the consumer has gone away so the thread can exit
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def worker():
+            try:
+                for item in iterator:
+                    if not put(item):
+                        return
+                put(done)
+            except Exception as e:
+                put(e)
+        
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+
+class Dataset:
+    """Samples stored as separate contiguous image and label arrays
+    
+    images is (samples, pixels) uint8 raw data or already-normalized floats;
+    labels is (samples,) uint8.
+    """
+    
+    def __init__(self, images, labels, num_classes=10):
+        self.images = images
+        self.labels = np.asarray(labels, dtype=np.uint8)
+        self.num_classes = num_classes
+        
+        if len(self.images) != len(self.labels):
+            raise ValueError(f"{len(self.images)} images but {len(self.labels)} labels")
+    
+    def __len__(self):
+        return len(self.labels)
+    
+    def __getitem__(self, index):
+        """Return (image, label) for an integer index, or a Dataset for slices and index arrays"""
+        if isinstance(index, (int, np.integer)):
+            return self.images[index], int(self.labels[index])
+        return Dataset(self.images[index], self.labels[index], self.num_classes)
+    
+    def inputs(self, indices=None, dtype=np.float32):
+        """Return network inputs for the given rows (all rows by default)"""
+        if self.images.dtype == np.uint8:
+            return MNISTDataLoader.normalize_batch(self.images, indices, dtype)
+        batch = self.images if indices is None else self.images[indices]
+        return np.asarray(batch, dtype=dtype)
+    
+    def targets(self, indices=None, num_classes=None, dtype=np.float32):
+        """Return one-hot targets for the given rows (all rows by default)"""
+        labels = self.labels if indices is None else self.labels[indices]
+        return MNISTDataLoader.create_targets(labels, num_classes or self.num_classes, dtype=dtype)
+    
+    def split(self, test_fraction=0.2, shuffle=True, seed=None):
+        """Split into (train, test) datasets"""
+        num_test = int(round(len(self) * test_fraction))
+        if shuffle:
+            order = np.random.default_rng(seed).permutation(len(self))
+        else:
+            order = np.arange(len(self))
         
-        return training_data
+        # Sorted indices keep each part in its original relative order
+        train_indices = np.sort(order[num_test:])
+        test_indices = np.sort(order[:num_test])
+        return self[train_indices], self[test_indices]
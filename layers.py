@@ -0,0 +1,50 @@
+import numpy as np
+from activations import get_activation
+
+
+class Dense:
+    """Fully connected layer: outputs = activation(inputs . weights.T + bias)
+    
+    Works on batches with one sample per row. Like the activations, the
+    methods write into preallocated buffers when they are given.
+    """
+    
+    def __init__(self, input_nodes, output_nodes, activation='sigmoid', bias=False, dtype=np.float32):
+        self.input_nodes = input_nodes
+        self.output_nodes = output_nodes
+        self.activation = get_activation(activation)
+        
+        # Weights are drawn in float64 so the same seed gives the same
+        # weights for every dtype; biases start at zero
+        self.weights = np.random.normal(0.0, pow(output_nodes, -0.5),
+                                        (output_nodes, input_nodes)).astype(dtype)
+        self.bias = np.zeros(output_nodes, dtype=dtype) if bias else None
+    
+    @property
+    def parameter_names(self):
+        """Names of the trainable arrays, in the order gradients are returned"""
+        if self.bias is None:
+            return ('weights',)
+        return ('weights', 'bias')
+    
+    def forward(self, inputs, out=None):
+        """Return the layer outputs for a batch, shape (batch, output_nodes)"""
+        out = np.dot(inputs, self.weights.T, out=out)
+        if self.bias is not None:
+            out += self.bias
+        return self.activation.forward(out, out=out)
+    
+    def deltas(self, outputs, errors, out=None):
+        """Return the errors times the activation derivative at outputs"""
+        if self.activation.cross_entropy:
+            return errors
+        out = self.activation.derivative(outputs, out=out)
+        out *= errors
+        return out
+    
+    def gradients(self, inputs, deltas, out):
+        """Write the updates summed over the batch into out, one array per parameter"""
+        np.dot(deltas.T, inputs, out=out[0])
+        if self.bias is not None:
+            np.sum(deltas, axis=0, out=out[1])
+        return out
@@ -1,11 +1,12 @@
 import numpy as np
 import os
-import random
 import urllib.request
 import gzip
 import shutil
 from neural_network import NeuralNetwork
-from data_loader import MNISTDataLoader
+from data_loader import MNISTDataLoader, Dataset
+from parallel_trainer import ParallelTrainer
+from optimizers import SGD, Warmup, CosineDecay, EarlyStopping
 
 def download_mnist_data():
     """Download MNIST dataset from alternative sources"""
@@ -66,63 +67,73 @@ def download_mnist_data():
     print("All mirrors failed. Using synthetic data.")
     return False
 
-def create_synthetic_data(num_samples=1000):
+# Define patterns for each digit (simplified versions)
+DIGIT_PATTERNS = {
+    0: lambda row, col: 100 if (8 <= row <= 20 and 8 <= col <= 20 and 
+                               (row-14)**2 + (col-14)**2 <= 36) else 0,
+    1: lambda row, col: 200 if (10 <= col <= 12 and row >= 6) else 0,
+    2: lambda row, col: 180 if ((8 <= row <= 10) or (18 <= row <= 20) or 
+                               (row + col >= 25 and row + col <= 35)) else 0,
+    3: lambda row, col: 190 if ((8 <= row <= 10) or (14 <= row <= 16) or 
+                               (18 <= row <= 20) or (col >= 20)) else 0,
+    4: lambda row, col: 170 if ((col >= 18) or (row <= 14 and col >= 10) or 
+                               (14 <= row <= 16)) else 0,
+    5: lambda row, col: 160 if ((8 <= row <= 10) or (14 <= row <= 16) or 
+                               (18 <= row <= 20) or (row >= 14 and col <= 8)) else 0,
+    6: lambda row, col: 150 if ((8 <= row <= 10) or (18 <= row <= 20) or 
+                               (col <= 8 and row >= 10) or (14 <= row <= 16)) else 0,
+    7: lambda row, col: 140 if ((8 <= row <= 10) or (col >= 18 and row <= 18)) else 0,
+    8: lambda row, col: 130 if ((8 <= row <= 10) or (14 <= row <= 16) or 
+                               (18 <= row <= 20) or (col <= 8) or (col >= 18)) else 0,
+    9: lambda row, col: 120 if ((8 <= row <= 10) or (14 <= row <= 16) or 
+                               (col >= 18) or (row <= 14 and col <= 8)) else 0
+}
+
+_digit_templates = None
+
+def get_digit_templates():
+    """Evaluate DIGIT_PATTERNS once into per-digit pixel masks and stroke values"""
+    global _digit_templates
+    if _digit_templates is None:
+        masks = np.zeros((10, 784), dtype=bool)
+        values = np.zeros(10, dtype=np.float32)
+        for digit, pattern_func in DIGIT_PATTERNS.items():
+            pixels = [pattern_func(i // 28, i % 28) for i in range(784)]
+            masks[digit] = np.array(pixels) > 0
+            values[digit] = max(pixels)
+        _digit_templates = (masks, values)
+    return _digit_templates
+
+def create_synthetic_data(num_samples=1000, seed=None, dtype=np.float32):
     """Create realistic synthetic handwritten digit data"""
     print("Creating realistic synthetic handwritten digit data...")
     
-    training_data = []
+    masks, values = get_digit_templates()
+    rng = np.random.default_rng(seed)
+    
+    samples_per_digit = num_samples // 10
+    labels = np.repeat(np.arange(10, dtype=np.uint8), samples_per_digit)
     
-    # Define patterns for each digit (simplified versions)
-    digit_patterns = {
-        0: lambda row, col: 100 if (8 <= row <= 20 and 8 <= col <= 20 and 
-                                   (row-14)**2 + (col-14)**2 <= 36) else 0,
-        1: lambda row, col: 200 if (10 <= col <= 12 and row >= 6) else 0,
-        2: lambda row, col: 180 if ((8 <= row <= 10) or (18 <= row <= 20) or 
-                                   (row + col >= 25 and row + col <= 35)) else 0,
-        3: lambda row, col: 190 if ((8 <= row <= 10) or (14 <= row <= 16) or 
-                                   (18 <= row <= 20) or (col >= 20)) else 0,
-        4: lambda row, col: 170 if ((col >= 18) or (row <= 14 and col >= 10) or 
-                                   (14 <= row <= 16)) else 0,
-        5: lambda row, col: 160 if ((8 <= row <= 10) or (14 <= row <= 16) or 
-                                   (18 <= row <= 20) or (row >= 14 and col <= 8)) else 0,
-        6: lambda row, col: 150 if ((8 <= row <= 10) or (18 <= row <= 20) or 
-                                   (col <= 8 and row >= 10) or (14 <= row <= 16)) else 0,
-        7: lambda row, col: 140 if ((8 <= row <= 10) or (col >= 18 and row <= 18)) else 0,
-        8: lambda row, col: 130 if ((8 <= row <= 10) or (14 <= row <= 16) or 
-                                   (18 <= row <= 20) or (col <= 8) or (col >= 18)) else 0,
-        9: lambda row, col: 120 if ((8 <= row <= 10) or (14 <= row <= 16) or 
-                                   (col >= 18) or (row <= 14 and col <= 8)) else 0
-    }
+    # One noise draw for every pixel of every sample, scaled in place below
+    images = rng.standard_normal((len(labels), 784), dtype=dtype)
     
     for digit in range(10):
-        samples_per_digit = num_samples // 10
-        for sample_idx in range(samples_per_digit):
-            # Create empty image
-            image = np.zeros(784)
-            
-            # Get the pattern function for this digit
-            pattern_func = digit_patterns[digit]
-            
-            # Apply the pattern
-            for i in range(784):
-                row, col = i // 28, i % 28
-                base_value = pattern_func(row, col)
-                if base_value > 0:
-                    # Add some noise and variation
-                    noise = np.random.normal(0, 20)
-                    image[i] = max(10, min(255, base_value + noise))
-                else:
-                    # Background with some noise
-                    image[i] = np.random.normal(10, 5)
-            
-            # Normalize to 0.01-0.99 range
-            image = image / 255.0 * 0.98 + 0.01
-            image = np.clip(image, 0.01, 0.99)
-            
-            training_data.append(np.concatenate(([digit], image)))
+        block = images[digit * samples_per_digit:(digit + 1) * samples_per_digit]
+        mask = masks[digit]
+        
+        # Strokes: pattern value with N(0, 20) noise, at least 10
+        # Background: N(10, 5) noise
+        block *= np.where(mask, 20.0, 5.0).astype(dtype)
+        block += np.where(mask, values[digit], 10.0).astype(dtype)
+        np.maximum(block, np.where(mask, 10.0, -np.inf).astype(dtype), out=block)
+    
+    # Normalize to 0.01-0.99 range
+    images *= 0.98 / 255.0
+    images += 0.01
+    np.clip(images, 0.01, 0.99, out=images)
     
-    print(f"Created {len(training_data)} synthetic samples")
-    return training_data
+    print(f"Created {len(labels)} synthetic samples")
+    return Dataset(images, labels)
 
 def load_local_mnist_if_exists():
     """Check if MNIST files already exist locally"""
@@ -142,23 +153,35 @@ def load_local_mnist_if_exists():
 def main():
     # Network parameters
     input_nodes = 784
-    hidden_nodes = 100
+    hidden_nodes = 100  # a tuple such as (200, 100) stacks several hidden layers
     output_nodes = 10
-    learning_rate = 0.3
-    epochs = 5
+    learning_rate = 0.1
+    momentum = 0.9
+    epochs = 10
+    patience = 3  # stop after this many epochs without a better accuracy
+    batch_size = 10
+    checkpoint_path = 'checkpoints/mnist_nn'
+    checkpoint_every = 1
+    num_workers = 1  # >1 splits each batch across worker processes
+    dtype = np.float32
+    data_seed = 0  # fixed so a resumed run gets the same synthetic data and split
     
-    # Create neural network
-    n = NeuralNetwork(input_nodes, hidden_nodes, output_nodes, learning_rate)
+    # Create neural network, resuming from the last checkpoint if there is one
+    if NeuralNetwork.checkpoint_exists(checkpoint_path):
+        n = NeuralNetwork.load(checkpoint_path)
+        print(f"Resuming from checkpoint {checkpoint_path} after {len(n.epoch_list)} epochs")
+    else:
+        n = NeuralNetwork(input_nodes, hidden_nodes, output_nodes, learning_rate, dtype,
+                          optimizer=SGD(learning_rate, momentum, nesterov=True))
     
     # Try to load data
-    training_data = []
-    test_data = []
+    loader = MNISTDataLoader()
+    train_set = Dataset(np.zeros((0, input_nodes), dtype=n.dtype), [])
+    test_set = Dataset(np.zeros((0, input_nodes), dtype=n.dtype), [])
     
     try:
         # First check if files exist locally
         if load_local_mnist_if_exists():
-            loader = MNISTDataLoader()
-            
             # Load training data
             train_images, train_labels = loader.load_data(
                 'data/train-images-idx3-ubyte', 
@@ -173,9 +196,9 @@ def main():
                 max_samples=200
             )
             
-            # Prepare data
-            training_data = loader.prepare_training_data(train_images, train_labels)
-            test_data = loader.prepare_training_data(test_images, test_labels)
+            # Prepare data (batches are normalized on the fly)
+            train_set = loader.prepare_training_data(train_images, train_labels)
+            test_set = loader.prepare_training_data(test_images, test_labels)
             
             print("Successfully loaded MNIST dataset from local files")
             
@@ -184,8 +207,6 @@ def main():
             print("No local MNIST files found. Attempting to download...")
             if download_mnist_data():
                 # If download successful, load the data
-                loader = MNISTDataLoader()
-                
                 train_images, train_labels = loader.load_data(
                     'data/train-images-idx3-ubyte', 
                     'data/train-labels-idx1-ubyte',
@@ -198,8 +219,8 @@ def main():
                     max_samples=200
                 )
                 
-                training_data = loader.prepare_training_data(train_images, train_labels)
-                test_data = loader.prepare_training_data(test_images, test_labels)
+                train_set = loader.prepare_training_data(train_images, train_labels)
+                test_set = loader.prepare_training_data(test_images, test_labels)
                 
                 print("Successfully downloaded and loaded MNIST dataset")
             else:
@@ -209,16 +230,14 @@ def main():
         print(f"Error loading MNIST data: {e}")
         print("Using high-quality synthetic data instead...")
         # Create synthetic data
-        synthetic_data = create_synthetic_data(1200)
+        synthetic_data = create_synthetic_data(1200, seed=data_seed, dtype=n.dtype)
         # Split into training and test
-        split_idx = len(synthetic_data) * 4 // 5
-        training_data = synthetic_data[:split_idx]
-        test_data = synthetic_data[split_idx:]
+        train_set, test_set = synthetic_data.split(test_fraction=0.2, seed=data_seed)
     
-    print(f"Training samples: {len(training_data)}")
-    print(f"Test samples: {len(test_data)}")
+    print(f"Training samples: {len(train_set)}")
+    print(f"Test samples: {len(test_set)}")
     
-    if len(training_data) == 0:
+    if len(train_set) == 0:
         print("Error: No training data available!")
         return
     
@@ -227,46 +246,65 @@ def main():
     print("Epoch Progress: Loss, Accuracy")
     print("-" * 50)
     
-    for epoch in range(epochs):
-        # Shuffle training data
-        random.shuffle(training_data)
-        
-        # Train on each sample
-        for i, record in enumerate(training_data):
-            inputs = record[1:]
-            targets = np.zeros(output_nodes) + 0.01
-            targets[int(record[0])] = 0.99
-            n.train(inputs, targets)
+    # Warm up over the first epoch, then anneal over the rest; a resumed
+    # optimizer keeps the schedule saved in its checkpoint
+    if n.optimizer.iterations == 0:
+        steps_per_epoch = -(-len(train_set) // batch_size)
+        n.optimizer.schedule = Warmup(steps_per_epoch,
+                                      CosineDecay((epochs - 1) * steps_per_epoch, min_factor=0.05))
+    early_stopping = EarlyStopping('accuracy', patience=patience)
+    
+    # A resumed run that already stopped early does not train further
+    first_epoch = len(n.epoch_list)
+    if early_stopping.should_stop(n):
+        print(f"Checkpoint already stopped early: {early_stopping.reason}")
+        first_epoch = epochs
+    
+    # Test inputs and one-hot targets are reused every epoch
+    test_inputs = test_set.inputs(dtype=n.dtype)
+    test_targets = test_set.targets(num_classes=output_nodes, dtype=n.dtype)
+    
+    trainer = ParallelTrainer(n, num_workers, max_batch_size=batch_size) if num_workers > 1 else n
+    
+    try:
+        for epoch in range(first_epoch, epochs):
+            # Train on shuffled mini-batches, building the next one in the background
+            for inputs, targets in loader.batch_generator(train_set.images, train_set.labels,
+                                                          batch_size=batch_size,
+                                                          num_classes=output_nodes,
+                                                          prefetch=True,
+                                                          dtype=n.dtype):
+                trainer.train_batch(inputs, targets)
             
-            # Show progress for large datasets
-            if len(training_data) > 500 and i % 100 == 0:
-                print(f"Epoch {epoch}: Processed {i}/{len(training_data)} samples")
-        
-        # Calculate accuracy and loss
-        accuracy = n.calculate_accuracy(test_data)
-        
-        # Calculate average loss on test set
-        total_loss = 0
-        test_samples = min(20, len(test_data))
-        for i in range(test_samples):
-            record = test_data[i]
-            inputs = record[1:]
-            targets_array = np.zeros(output_nodes) + 0.01
-            targets_array[int(record[0])] = 0.99
-            outputs = n.query(inputs)
-            loss = n.calculate_loss(outputs, targets_array)
-            total_loss += loss
-        
-        avg_loss = total_loss / test_samples
-        
-        n.epoch_list.append(epoch)
-        n.loss_list.append(avg_loss)
-        n.accuracy_list.append(accuracy)
-        
-        print(f"Epoch {epoch}: Loss = {avg_loss:.4f}, Accuracy = {accuracy:.4f}")
+            # Calculate accuracy and loss
+            accuracy = n.calculate_accuracy(test_set)
+            
+            # Calculate average loss on test set
+            outputs = n.predict_proba(test_inputs)
+            avg_loss = n.calculate_loss(outputs, test_targets)
+            
+            n.epoch_list.append(epoch)
+            n.loss_list.append(avg_loss)
+            n.accuracy_list.append(accuracy)
+            
+            print(f"Epoch {epoch}: Loss = {avg_loss:.4f}, Accuracy = {accuracy:.4f}, "
+                  f"LR = {n.optimizer.current_learning_rate():.4f}")
+            
+            stop = early_stopping.should_stop(n)
+            
+            # Save a checkpoint so an interrupted run can resume from here
+            if (epoch + 1) % checkpoint_every == 0 or epoch == epochs - 1 or stop:
+                n.save(checkpoint_path)
+            
+            if stop:
+                print(f"Stopping early: {early_stopping.reason}")
+                break
+    finally:
+        if trainer is not n:
+            trainer.close()
     
     # Final testing
-    final_accuracy = n.calculate_accuracy(test_data)
+    final_accuracy = n.calculate_accuracy(test_set)
     print("-" * 50)
     print(f"Training completed!")
     print(f"Final test accuracy: {final_accuracy:.4f} ({final_accuracy*100:.2f}%)")
@@ -280,12 +318,10 @@ def main():
     # Test some samples
     print("\nSample Predictions:")
     print("-" * 40)
-    test_samples = min(8, len(test_data))
+    test_samples = min(8, len(test_set))
     for i in range(test_samples):
-        record = test_data[i]
-        inputs = record[1:]
-        target = int(record[0])
-        outputs = n.query(inputs)
+        target = int(test_set.labels[i])
+        outputs = n.query(test_inputs[i])
         predicted = np.argmax(outputs)
         confidence = outputs[predicted][0]
         
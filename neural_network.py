@@ -1,95 +1,382 @@
 import numpy as np
+import json
+import os
 import random
+import re
+import uuid
 import matplotlib.pyplot as plt
+from activations import get_activation
+from layers import Dense
+from optimizers import get_optimizer
 
 class NeuralNetwork:
-    def __init__(self, input_nodes, hidden_nodes, output_nodes, learning_rate):
-        # Set network architecture
+    # Checkpoints written before layers were configurable used these names
+    # for the two weight matrices
+    LEGACY_WEIGHT_NAMES = {'weights_0': 'weights_input_hidden', 'weights_1': 'weights_hidden_output'}
+    
+    def __init__(self, input_nodes, hidden_nodes, output_nodes, learning_rate, dtype=np.float32,
+                 hidden_activation='sigmoid', output_activation='sigmoid', bias=False, optimizer=None):
+        # Set network architecture; hidden_nodes is a layer size or a
+        # sequence of sizes for several hidden layers
         self.input_nodes = input_nodes
         self.hidden_nodes = hidden_nodes
         self.output_nodes = output_nodes
-        self.learning_rate = learning_rate
+        self.bias = bias
+        if np.ndim(hidden_nodes) == 0:
+            hidden_sizes = [hidden_nodes]
+        else:
+            hidden_sizes = list(hidden_nodes)
+        self.layer_sizes = [input_nodes, *hidden_sizes, output_nodes]
+        
+        # Floating point type of weights, activations and updates
+        self.dtype = np.dtype(dtype)
+        
+        # Activation functions: names from activations.ACTIVATIONS or Activation objects
+        self.hidden_activation = get_activation(hidden_activation)
+        self.output_activation = get_activation(output_activation)
+        if self.hidden_activation.cross_entropy:
+            raise ValueError(f"{self.hidden_activation.name} can only be used as the output activation")
+        self.activation_function = self.hidden_activation.forward
         
-        # Initialize weight matrices (using normal distribution)
-        self.weights_input_hidden = np.random.normal(0.0, pow(self.hidden_nodes, -0.5), 
-                                                    (self.hidden_nodes, self.input_nodes))
-        self.weights_hidden_output = np.random.normal(0.0, pow(self.output_nodes, -0.5), 
-                                                     (self.output_nodes, self.hidden_nodes))
+        # One Dense layer per weight matrix, created in order so a seed gives
+        # the same initial weights as the original two-matrix network
+        self.layers = []
+        for i, (layer_inputs, layer_outputs) in enumerate(zip(self.layer_sizes, self.layer_sizes[1:])):
+            activation = self.output_activation if i == len(self.layer_sizes) - 2 else self.hidden_activation
+            self.layers.append(Dense(layer_inputs, layer_outputs, activation, bias, self.dtype))
         
-        # Activation function (sigmoid)
-        self.activation_function = lambda x: 1 / (1 + np.exp(-x))
+        # Parameter update rule: a name ('sgd', 'momentum', 'nesterov', 'adam')
+        # using learning_rate, or an Optimizer; plain SGD by default
+        self.optimizer = get_optimizer(optimizer, learning_rate)
+        
+        # Per-batch-size buffers reused by compute_gradients()
+        self._workspace = {}
         
         # Record training progress
         self.epoch_list = []
         self.loss_list = []
         self.accuracy_list = []
     
+    @property
+    def learning_rate(self):
+        """Base learning rate of the optimizer (before any schedule)"""
+        return self.optimizer.learning_rate
+    
+    @learning_rate.setter
+    def learning_rate(self, learning_rate):
+        self.optimizer.learning_rate = learning_rate
+    
+    @property
+    def weights_input_hidden(self):
+        """Weights of the first layer"""
+        return self.layers[0].weights
+    
+    @weights_input_hidden.setter
+    def weights_input_hidden(self, weights):
+        self.layers[0].weights = weights
+    
+    @property
+    def weights_hidden_output(self):
+        """Weights of the last layer"""
+        return self.layers[-1].weights
+    
+    @weights_hidden_output.setter
+    def weights_hidden_output(self, weights):
+        self.layers[-1].weights = weights
+    
+    def parameters(self):
+        """Return (name, array) pairs for every layer's weights and biases
+        
+        Names are like 'weights_0' and 'bias_0', numbered by layer; the order
+        matches the gradients returned by compute_gradients().
+        """
+        return [(f"{name}_{i}", getattr(layer, name))
+                for i, layer in enumerate(self.layers) for name in layer.parameter_names]
+    
+    def set_parameter(self, name, array):
+        """Replace one of the arrays named by parameters()"""
+        attribute, index = name.rsplit('_', 1)
+        setattr(self.layers[int(index)], attribute, array)
+    
+    def get_config(self):
+        """Constructor arguments that recreate this network (with new weights)"""
+        return {
+            'input_nodes': self.input_nodes,
+            'hidden_nodes': self.hidden_nodes if np.ndim(self.hidden_nodes) == 0 else list(self.hidden_nodes),
+            'output_nodes': self.output_nodes,
+            'learning_rate': self.learning_rate,
+            'dtype': self.dtype.name,
+            'hidden_activation': self.hidden_activation.name,
+            'output_activation': self.output_activation.name,
+            'bias': self.bias,
+            'optimizer': self.optimizer.get_config(),
+        }
+    
     def train(self, inputs_list, targets_list):
         """Train the network with one sample"""
-        # Convert to 2D arrays
-        inputs = np.array(inputs_list, ndmin=2).T
-        targets = np.array(targets_list, ndmin=2).T
+        # A single sample is a batch of one row
+        self.train_batch(np.array(inputs_list, ndmin=2, dtype=self.dtype),
+                         np.array(targets_list, ndmin=2, dtype=self.dtype))
+    
+    def train_batch(self, inputs, targets):
+        """Train the network with a mini-batch of samples (one sample per row)"""
+        inputs = np.asarray(inputs, dtype=self.dtype)
+        self.apply_gradients(self.compute_gradients(inputs, targets), inputs.shape[0])
+    
+    def compute_gradients(self, inputs, targets):
+        """Return the parameter updates summed over a mini-batch, in parameters() order
         
-        # Forward propagation - hidden layer
-        hidden_inputs = np.dot(self.weights_input_hidden, inputs)
-        hidden_outputs = self.activation_function(hidden_inputs)
+        The sums are not yet scaled by the learning rate or batch size, so
+        updates computed on separate shards of a batch can simply be added.
+        The returned arrays are workspace buffers that the next call overwrites.
+        """
+        inputs = np.asarray(inputs, dtype=self.dtype)
+        targets = np.asarray(targets, dtype=self.dtype)
+        work = self._get_workspace(inputs.shape[0])
         
-        # Forward propagation - output layer
-        final_inputs = np.dot(self.weights_hidden_output, hidden_outputs)
-        final_outputs = self.activation_function(final_inputs)
+        # Forward propagation, keeping every layer's outputs
+        outputs = [inputs]
+        for layer, layer_work in zip(self.layers, work['layers']):
+            outputs.append(layer.forward(outputs[-1], out=layer_work['outputs']))
         
         # Calculate output layer errors
-        output_errors = targets - final_outputs
+        errors = np.subtract(targets, outputs[-1], out=work['layers'][-1]['errors'])
         
-        # Calculate hidden layer errors
-        hidden_errors = np.dot(self.weights_hidden_output.T, output_errors)
+        # Backward propagation: each layer's deltas are passed back through its
+        # weights. The original two-layer network passed the output errors
+        # back instead, so a single hidden layer keeps that rule and trains
+        # exactly as before
+        pass_back_errors = len(self.layers) == 2
+        for i in reversed(range(len(self.layers))):
+            layer, layer_work = self.layers[i], work['layers'][i]
+            deltas = layer.deltas(outputs[i + 1], errors, out=layer_work['deltas'])
+            layer.gradients(outputs[i], deltas, out=layer_work['gradients'])
+            if i > 0:
+                errors = np.dot(errors if pass_back_errors else deltas, layer.weights,
+                                out=work['layers'][i - 1]['errors'])
         
-        # Update hidden to output weights
-        self.weights_hidden_output += self.learning_rate * np.dot(
-            (output_errors * final_outputs * (1.0 - final_outputs)), 
-            hidden_outputs.T
-        )
+        return work['gradients']
+    
+    def _get_workspace(self, batch_size):
+        """Return the buffers for a batch size, allocating them on first use"""
+        work = self._workspace.get(batch_size)
+        if work is None:
+            # Keep at most the full-size and the final partial batch
+            if len(self._workspace) >= 2:
+                self._workspace.clear()
+            work = {'layers': [], 'gradients': []}
+            for layer in self.layers:
+                shape = (batch_size, layer.output_nodes)
+                gradients = [np.empty(getattr(layer, name).shape, dtype=self.dtype)
+                             for name in layer.parameter_names]
+                work['layers'].append({
+                    'outputs': np.empty(shape, dtype=self.dtype),
+                    'errors': np.empty(shape, dtype=self.dtype),
+                    'deltas': np.empty(shape, dtype=self.dtype),
+                    'gradients': gradients,
+                })
+                work['gradients'].extend(gradients)
+            self._workspace[batch_size] = work
+        return work
+    
+    def apply_gradients(self, gradients, batch_size):
+        """Apply updates from compute_gradients() summed over batch_size samples
         
-        # Update input to hidden weights
-        self.weights_input_hidden += self.learning_rate * np.dot(
-            (hidden_errors * hidden_outputs * (1.0 - hidden_outputs)), 
-            inputs.T
-        )
+        The optimizer uses the gradient arrays as scratch space.
+        """
+        # Gradients are averaged over the batch so the learning rate does not
+        # have to be retuned for every batch size
+        self.optimizer.step([parameter for _, parameter in self.parameters()], gradients, batch_size)
+    
+    def fit(self, inputs, targets=None, batch_size=32, shuffle=True):
+        """Train the network for one epoch over all samples in mini-batches
+        
+        inputs may also be a Dataset, in which case targets are built from
+        its labels one batch at a time.
+        """
+        if targets is None:
+            dataset = inputs
+            get_batch = lambda batch: (dataset.inputs(batch, self.dtype),
+                                       dataset.targets(batch, self.output_nodes, self.dtype))
+            num_samples = len(dataset)
+        else:
+            inputs = np.asarray(inputs, dtype=self.dtype)
+            targets = np.asarray(targets, dtype=self.dtype)
+            get_batch = lambda batch: (inputs[batch], targets[batch])
+            num_samples = inputs.shape[0]
+        
+        if shuffle:
+            order = np.random.permutation(num_samples)
+        else:
+            order = np.arange(num_samples)
+        
+        for start in range(0, num_samples, batch_size):
+            batch = order[start:start + batch_size]
+            self.train_batch(*get_batch(batch))
     
     def query(self, inputs_list):
         """Query the network for predictions"""
-        inputs = np.array(inputs_list, ndmin=2).T
+        inputs = np.array(inputs_list, ndmin=2, dtype=self.dtype)
         
-        # Calculate hidden layer outputs
-        hidden_inputs = np.dot(self.weights_input_hidden, inputs)
-        hidden_outputs = self.activation_function(hidden_inputs)
+        # Single sample is scored as a batch of one and returned as a column
+        return self.predict_proba(inputs).T
+    
+    def predict_proba(self, inputs):
+        """Query the network for a batch of samples (one sample per row)"""
+        outputs = np.asarray(inputs, dtype=self.dtype)
         
-        # Calculate output layer outputs
-        final_inputs = np.dot(self.weights_hidden_output, hidden_outputs)
-        final_outputs = self.activation_function(final_inputs)
+        # Each layer's activation is applied in place; final shape (batch, output)
+        for layer in self.layers:
+            outputs = layer.forward(outputs)
         
-        return final_outputs
+        return outputs
+    
+    def predict_batch(self, inputs):
+        """Predict class labels for a batch of samples"""
+        return np.argmax(self.predict_proba(inputs), axis=1)
     
     def calculate_loss(self, outputs, targets):
-        """Calculate loss function (Mean Squared Error)"""
-        return np.mean((targets - outputs) ** 2)
+        """Calculate loss function (Mean Squared Error, or cross-entropy for softmax outputs)"""
+        return self.output_activation.loss(outputs, targets)
     
     def calculate_accuracy(self, test_data):
-        """Calculate accuracy on test data"""
-        correct = 0
-        total = len(test_data)
-        
-        for record in test_data:
-            inputs = record[1:]
-            targets = int(record[0])
-            
-            outputs = self.query(inputs)
-            predicted = np.argmax(outputs)
-            
-            if predicted == targets:
-                correct += 1
-        
-        return correct / total
+        """Calculate accuracy on test data (a Dataset or a list of label-first records)"""
+        if len(test_data) == 0:
+            return 0.0
+        
+        if hasattr(test_data, 'labels'):
+            inputs = test_data.inputs(dtype=self.dtype)
+            targets = test_data.labels
+        else:
+            inputs = np.array([record[1:] for record in test_data])
+            targets = np.array([int(record[0]) for record in test_data])
+        
+        predicted = self.predict_batch(inputs)
+        
+        return np.mean(predicted == targets)
+    
+    def save(self, path):
+        """Save weights, hyperparameters and training history to a checkpoint directory
+        
+        Weights and optimizer state (e.g. velocity_weights_0) are stored as raw
+        .npy files so load() can memory-map them. Every save writes new,
+        versioned files and then replaces model.json, which lists them, so an
+        interrupted save leaves the previous checkpoint whole and files that
+        load() has mapped are never overwritten.
+        """
+        os.makedirs(path, exist_ok=True)
+        previous = self._listed_files(path)
+        
+        arrays = self.parameters()
+        for state_name, state_arrays in self.optimizer.state.items():
+            arrays += [(f"{state_name}_{name}", array)
+                       for (name, _), array in zip(self.parameters(), state_arrays)]
+        
+        version = f"{len(self.epoch_list)}-{uuid.uuid4().hex[:8]}"
+        files = {}
+        for name, array in arrays:
+            files[name] = f"{name}.{version}.npy"
+            with open(os.path.join(path, files[name]), 'wb') as f:
+                np.save(f, array)
+        
+        state = {
+            **self.get_config(),
+            'epoch_list': [int(epoch) for epoch in self.epoch_list],
+            'loss_list': [float(loss) for loss in self.loss_list],
+            'accuracy_list': [float(accuracy) for accuracy in self.accuracy_list],
+            'files': files,
+        }
+        
+        # Replacing model.json is the single step that switches checkpoints
+        target = os.path.join(path, 'model.json')
+        with open(target + '.tmp', 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(target + '.tmp', target)
+        
+        self._remove_stale_files(path, set(files) | set(previous), set(files.values()))
+    
+    @staticmethod
+    def _listed_files(path):
+        """Array name -> file name from the model.json in path ({} if there is none)"""
+        try:
+            with open(os.path.join(path, 'model.json')) as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError):
+            return {}
+    
+    @classmethod
+    def _remove_stale_files(cls, path, names, keep):
+        """Delete files of the named arrays that model.json no longer lists
+        
+        Only versioned files (name.version.npy) from earlier or interrupted
+        saves and the unversioned files of older checkpoints are removed;
+        anything else in the directory is left alone.
+        """
+        names = names | {cls.LEGACY_WEIGHT_NAMES[name] for name in names if name in cls.LEGACY_WEIGHT_NAMES}
+        pattern = re.compile(r'(?:%s)(?:\.\d+-[0-9a-f]{8})?\.npy' % '|'.join(map(re.escape, sorted(names))))
+        for filename in os.listdir(path):
+            if pattern.fullmatch(filename) and filename not in keep:
+                try:
+                    os.remove(os.path.join(path, filename))
+                except OSError:
+                    # Still memory-mapped on Windows; a later save removes it
+                    pass
+    
+    @classmethod
+    def load(cls, path):
+        """Load a network saved with save(); weights are copy-on-write memory maps"""
+        with open(os.path.join(path, 'model.json')) as f:
+            state = json.load(f)
+        
+        # Checkpoints written before the dtype option were float64
+        network = cls(state['input_nodes'], state['hidden_nodes'],
+                      state['output_nodes'], state['learning_rate'],
+                      dtype=state.get('dtype', 'float64'),
+                      hidden_activation=state.get('hidden_activation', 'sigmoid'),
+                      output_activation=state.get('output_activation', 'sigmoid'),
+                      bias=state.get('bias', False),
+                      optimizer=state.get('optimizer'))
+        
+        # Checkpoints written before model.json listed the files used
+        # unversioned names
+        files = state.get('files')
+        
+        def filename_for(name):
+            if files is not None:
+                return os.path.join(path, files[name]) if name in files else None
+            filename = os.path.join(path, f"{name}.npy")
+            if not os.path.exists(filename) and name in cls.LEGACY_WEIGHT_NAMES:
+                filename = os.path.join(path, f"{cls.LEGACY_WEIGHT_NAMES[name]}.npy")
+            return filename
+        
+        for name, expected in network.parameters():
+            weights = np.load(filename_for(name), mmap_mode='c')
+            if weights.shape != expected.shape:
+                raise ValueError(f"{name} in {path} has shape {weights.shape}, "
+                                 f"expected {expected.shape}")
+            if weights.dtype != network.dtype:
+                raise ValueError(f"{name} in {path} is {weights.dtype}, expected {network.dtype}")
+            network.set_parameter(name, weights)
+        
+        # Optimizer state is only used when every array was saved, otherwise
+        # the optimizer starts from fresh state
+        optimizer = network.optimizer
+        filenames = {state_name: [filename_for(f"{state_name}_{name}")
+                                  for name, _ in network.parameters()]
+                     for state_name in optimizer.STATE_NAMES}
+        if all(filename and os.path.exists(filename) for names in filenames.values() for filename in names):
+            optimizer.state = {state_name: [np.load(filename, mmap_mode='c') for filename in names]
+                               for state_name, names in filenames.items()}
+        
+        network.epoch_list = state['epoch_list']
+        network.loss_list = state['loss_list']
+        network.accuracy_list = state['accuracy_list']
+        return network
+    
+    @staticmethod
+    def checkpoint_exists(path):
+        """Check whether path holds a complete checkpoint"""
+        return os.path.exists(os.path.join(path, 'model.json'))
     
     def plot_training_progress(self):
         """Plot training progress (loss and accuracy)"""
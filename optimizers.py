@@ -0,0 +1,309 @@
+import math
+
+import numpy as np
+
+
+class Schedule:
+    """Learning rate multiplier as a function of the optimizer step (0-based)"""
+    
+    name = None
+    
+    def __call__(self, step):
+        raise NotImplementedError
+    
+    def get_config(self):
+        return {'name': self.name}
+
+
+class StepDecay(Schedule):
+    """Multiply the learning rate by gamma every step_size steps"""
+    
+    name = 'step'
+    
+    def __init__(self, step_size, gamma=0.1):
+        self.step_size = step_size
+        self.gamma = gamma
+    
+    def __call__(self, step):
+        return self.gamma ** (step // self.step_size)
+    
+    def get_config(self):
+        return {'name': self.name, 'step_size': self.step_size, 'gamma': self.gamma}
+
+
+class CosineDecay(Schedule):
+    """Anneal from the full learning rate to min_factor times it over total_steps"""
+    
+    name = 'cosine'
+    
+    def __init__(self, total_steps, min_factor=0.0):
+        self.total_steps = total_steps
+        self.min_factor = min_factor
+    
+    def __call__(self, step):
+        progress = min(step, self.total_steps) / max(self.total_steps, 1)
+        return self.min_factor + (1.0 - self.min_factor) * 0.5 * (1.0 + math.cos(math.pi * progress))
+    
+    def get_config(self):
+        return {'name': self.name, 'total_steps': self.total_steps, 'min_factor': self.min_factor}
+
+
+class Warmup(Schedule):
+    """Ramp the learning rate up linearly over warmup_steps, then follow schedule
+    
+    The wrapped schedule starts counting from 0 when the warmup ends.
+    """
+    
+    name = 'warmup'
+    
+    def __init__(self, warmup_steps, schedule=None):
+        self.warmup_steps = warmup_steps
+        self.schedule = get_schedule(schedule)
+    
+    def __call__(self, step):
+        if step < self.warmup_steps:
+            return (step + 1) / self.warmup_steps
+        if self.schedule is None:
+            return 1.0
+        return self.schedule(step - self.warmup_steps)
+    
+    def get_config(self):
+        return {'name': self.name, 'warmup_steps': self.warmup_steps,
+                'schedule': self.schedule.get_config() if self.schedule else None}
+
+
+SCHEDULES = {
+    schedule.name: schedule
+    for schedule in (StepDecay, CosineDecay, Warmup)
+}
+
+
+def get_schedule(schedule):
+    """Return a Schedule for a get_config() dict (instances and None pass through)"""
+    if schedule is None or isinstance(schedule, Schedule):
+        return schedule
+    config = dict(schedule)
+    name = config.pop('name')
+    try:
+        schedule_class = SCHEDULES[name]
+    except KeyError:
+        raise ValueError(f"unknown schedule {name!r}, expected one of {sorted(SCHEDULES)}")
+    return schedule_class(**config)
+
+
+class Optimizer:
+    """Applies the summed updates from NeuralNetwork.compute_gradients()
+    
+    The updates point in the direction that lowers the loss, so they are
+    added to the parameters. step() averages them over the batch and uses
+    the gradient arrays as scratch space, so it allocates nothing once its
+    state buffers exist. State buffers are created on the first step and
+    named by STATE_NAMES.
+    """
+    
+    name = None
+    STATE_NAMES = ()
+    
+    def __init__(self, learning_rate, schedule=None):
+        self.learning_rate = learning_rate
+        self.schedule = get_schedule(schedule)
+        self.iterations = 0
+        self.state = {}
+    
+    def current_learning_rate(self):
+        """Learning rate for the next step, after the schedule"""
+        if self.schedule is None:
+            return self.learning_rate
+        return self.learning_rate * self.schedule(self.iterations)
+    
+    def _get_state(self, parameters):
+        if not self.state:
+            self.state = {name: [np.zeros_like(parameter) for parameter in parameters]
+                          for name in self.STATE_NAMES}
+        return self.state
+    
+    def step(self, parameters, gradients, batch_size):
+        """Update parameters in place from gradients summed over batch_size samples"""
+        learning_rate = self.current_learning_rate()
+        self._update(parameters, gradients, batch_size, learning_rate)
+        self.iterations += 1
+    
+    def _update(self, parameters, gradients, batch_size, learning_rate):
+        raise NotImplementedError
+    
+    def get_config(self):
+        """Constructor arguments plus the step count, as saved in checkpoints"""
+        return {'name': self.name, 'learning_rate': self.learning_rate,
+                'schedule': self.schedule.get_config() if self.schedule else None,
+                'iterations': self.iterations}
+
+
+class SGD(Optimizer):
+    """Stochastic gradient descent with optional (Nesterov) momentum"""
+    
+    name = 'sgd'
+    
+    def __init__(self, learning_rate, momentum=0.0, nesterov=False, schedule=None):
+        super().__init__(learning_rate, schedule)
+        if nesterov and not momentum:
+            raise ValueError("nesterov requires a momentum above 0")
+        self.momentum = momentum
+        self.nesterov = nesterov
+    
+    @property
+    def STATE_NAMES(self):
+        return ('velocity',) if self.momentum else ()
+    
+    def _update(self, parameters, gradients, batch_size, learning_rate):
+        if not self.momentum:
+            # Plain SGD: one scale, as train_batch has always done
+            scale = learning_rate / batch_size
+            for parameter, gradient in zip(parameters, gradients):
+                gradient *= scale
+                parameter += gradient
+            return
+        
+        velocities = self._get_state(parameters)['velocity']
+        for parameter, gradient, velocity in zip(parameters, gradients, velocities):
+            gradient *= 1.0 / batch_size
+            velocity *= self.momentum
+            velocity += gradient
+            if self.nesterov:
+                # Look ahead: step along the gradient plus momentum times the new velocity
+                gradient *= learning_rate
+                parameter += gradient
+                np.multiply(velocity, learning_rate * self.momentum, out=gradient)
+            else:
+                np.multiply(velocity, learning_rate, out=gradient)
+            parameter += gradient
+    
+    def get_config(self):
+        return {**super().get_config(), 'momentum': self.momentum, 'nesterov': self.nesterov}
+
+
+class Adam(Optimizer):
+    """Adam: per-parameter step sizes from running gradient moments"""
+    
+    name = 'adam'
+    STATE_NAMES = ('mean', 'variance')
+    
+    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8, schedule=None):
+        super().__init__(learning_rate, schedule)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+    
+    def _update(self, parameters, gradients, batch_size, learning_rate):
+        state = self._get_state(parameters)
+        
+        # Corrections for the moments' bias towards their zero start
+        t = self.iterations + 1
+        mean_correction = 1.0 / (1.0 - self.beta1 ** t)
+        variance_correction = 1.0 / math.sqrt(1.0 - self.beta2 ** t)
+        
+        for parameter, gradient, mean, variance in zip(parameters, gradients,
+                                                       state['mean'], state['variance']):
+            gradient *= 1.0 / batch_size
+            
+            # mean = beta1 * mean + (1 - beta1) * gradient, without a temporary
+            mean -= gradient
+            mean *= self.beta1
+            mean += gradient
+            
+            # Same for the squared gradient, squared in place
+            np.square(gradient, out=gradient)
+            variance -= gradient
+            variance *= self.beta2
+            variance += gradient
+            
+            # parameter += learning_rate * mean_hat / (sqrt(variance_hat) + epsilon)
+            np.sqrt(variance, out=gradient)
+            gradient *= variance_correction
+            gradient += self.epsilon
+            np.divide(mean, gradient, out=gradient)
+            gradient *= learning_rate * mean_correction
+            parameter += gradient
+    
+    def get_config(self):
+        return {**super().get_config(), 'beta1': self.beta1, 'beta2': self.beta2, 'epsilon': self.epsilon}
+
+
+OPTIMIZERS = {
+    optimizer.name: optimizer
+    for optimizer in (SGD, Adam)
+}
+
+
+def get_optimizer(optimizer, learning_rate):
+    """Return an Optimizer for a name, a get_config() dict or an instance
+    
+    Names ('sgd', 'momentum', 'nesterov', 'adam') use learning_rate; dicts
+    and instances keep their own.
+    """
+    if isinstance(optimizer, Optimizer):
+        return optimizer
+    if optimizer is None or optimizer == 'sgd':
+        return SGD(learning_rate)
+    if optimizer == 'momentum':
+        return SGD(learning_rate, momentum=0.9)
+    if optimizer == 'nesterov':
+        return SGD(learning_rate, momentum=0.9, nesterov=True)
+    if isinstance(optimizer, str):
+        config = {'name': optimizer, 'learning_rate': learning_rate}
+    else:
+        config = dict(optimizer)
+    
+    name = config.pop('name')
+    iterations = config.pop('iterations', 0)
+    try:
+        optimizer_class = OPTIMIZERS[name]
+    except KeyError:
+        raise ValueError(f"unknown optimizer {name!r}, expected one of {sorted(OPTIMIZERS)} "
+                         f"or 'momentum'/'nesterov'")
+    optimizer = optimizer_class(**config)
+    optimizer.iterations = iterations
+    return optimizer
+
+
+class EarlyStopping:
+    """Decide when to stop training from a network's accuracy_list or loss_list
+    
+    Stops when the monitored value has not improved by more than min_delta
+    for patience epochs, or as soon as it reaches target. Only the recorded
+    history is used, so the decision survives resuming from a checkpoint.
+    """
+    
+    def __init__(self, monitor='accuracy', patience=3, min_delta=0.0, target=None):
+        if monitor not in ('accuracy', 'loss'):
+            raise ValueError(f"monitor must be 'accuracy' or 'loss', not {monitor!r}")
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.target = target
+        self.best_epoch = None
+        self.reason = None
+    
+    def should_stop(self, network):
+        """Return True when training should stop after the last recorded epoch"""
+        history = network.accuracy_list if self.monitor == 'accuracy' else network.loss_list
+        if not history:
+            return False
+        
+        # Compare so that larger is always better
+        sign = 1.0 if self.monitor == 'accuracy' else -1.0
+        values = [sign * float(value) for value in history]
+        
+        best_index = 0
+        for index, value in enumerate(values):
+            if value > values[best_index] + self.min_delta:
+                best_index = index
+        self.best_epoch = network.epoch_list[best_index] if network.epoch_list else best_index
+        
+        if self.target is not None and values[-1] >= sign * self.target:
+            self.reason = f"{self.monitor} reached {self.target}"
+            return True
+        if len(values) - 1 - best_index >= self.patience:
+            self.reason = (f"{self.monitor} has not improved for {self.patience} epochs "
+                           f"(best at epoch {self.best_epoch})")
+            return True
+        return False
@@ -0,0 +1,275 @@
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from data_loader import MNISTDataLoader
+from neural_network import NeuralNetwork
+
+
+def _attach(name, shape, dtype):
+    """Attach to a shared memory block created by the parent process"""
+    # Workers share the parent's resource tracker, so the block is still
+    # unlinked exactly once, by the parent in ParallelTrainer.close()
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _worker(conn, layout, config):
+    """Compute weight updates for shards of the shared batch until told to stop"""
+    blocks = []
+    arrays = {}
+    for key, (name, shape, dtype) in layout.items():
+        block, arrays[key] = _attach(name, shape, dtype)
+        blocks.append(block)
+    
+    # Weights are views of the parent's arrays, so every update the parent
+    # applies is visible here without copying
+    network = NeuralNetwork(**config)
+    names = [name for name, _ in network.parameters()]
+    for name in names:
+        network.set_parameter(name, arrays[name])
+    
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            start, stop = task
+            try:
+                gradients = network.compute_gradients(arrays['inputs'][start:stop],
+                                                      arrays['targets'][start:stop])
+                for name, gradient in zip(names, gradients):
+                    np.copyto(arrays['grad_' + name], gradient)
+            except Exception as e:
+                conn.send(e)
+            else:
+                conn.send(None)
+    finally:
+        del network, arrays
+        for block in blocks:
+            block.close()
+
+
+class ParallelTrainer:
+    """Data-parallel mini-batch training of a NeuralNetwork across worker processes
+    
+    The network's weights are moved into shared memory. For each batch every
+    worker computes the updates for its shard, the parent adds them up and
+    applies them once, so the result matches NeuralNetwork.train_batch up to
+    floating point summation order.
+    """
+    
+    # Seconds between liveness checks while waiting for a worker's result
+    POLL_INTERVAL = 1.0
+    
+    def __init__(self, network, num_workers=None, max_batch_size=256):
+        self.network = network
+        self.num_workers = num_workers or mp.cpu_count()
+        self.max_batch_size = max_batch_size
+        self._blocks = []
+        self._workers = []
+        self._conns = []
+        
+        config = network.get_config()
+        
+        # Shared weights and biases replace the network's own arrays
+        shared = {}
+        for name, array in network.parameters():
+            shared[name] = self._create(array.shape, array.dtype)
+            np.copyto(shared[name][1], array)
+            network.set_parameter(name, shared[name][1])
+        
+        # Batch buffers the parent fills and the workers slice
+        shared['inputs'] = self._create((max_batch_size, network.input_nodes), network.dtype)
+        shared['targets'] = self._create((max_batch_size, network.output_nodes), network.dtype)
+        self._inputs = shared['inputs'][1]
+        self._targets = shared['targets'][1]
+        
+        # Each worker writes its updates to its own buffers
+        self._gradients = []
+        context = mp.get_context()
+        for _ in range(self.num_workers):
+            layout = {key: (block.name, array.shape, array.dtype) for key, (block, array) in shared.items()}
+            gradients = []
+            for name, parameter in network.parameters():
+                block, array = self._create(parameter.shape, network.dtype)
+                layout['grad_' + name] = (block.name, array.shape, array.dtype)
+                gradients.append(array)
+            self._gradients.append(gradients)
+            
+            parent_conn, child_conn = context.Pipe()
+            worker = context.Process(target=_worker,
+                                     args=(child_conn, layout, config), daemon=True)
+            worker.start()
+            child_conn.close()
+            self._workers.append(worker)
+            self._conns.append(parent_conn)
+        
+        self._totals = [np.zeros_like(gradient) for gradient in self._gradients[0]]
+    
+    def _create(self, shape, dtype):
+        """Allocate a shared memory block and return it with an array view"""
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    
+    def train_batch(self, inputs, targets):
+        """Train on one mini-batch, split evenly across the workers"""
+        batch_size = len(inputs)
+        if batch_size > self.max_batch_size:
+            raise ValueError(f"batch of {batch_size} exceeds max_batch_size={self.max_batch_size}")
+        
+        self._inputs[:batch_size] = inputs
+        self._targets[:batch_size] = targets
+        
+        bounds = [batch_size * i // self.num_workers for i in range(self.num_workers + 1)]
+        active = []
+        for worker_id, (start, stop) in enumerate(zip(bounds, bounds[1:])):
+            if stop > start:
+                try:
+                    self._conns[worker_id].send((start, stop))
+                except (BrokenPipeError, OSError):
+                    raise self._worker_died(worker_id)
+                active.append(worker_id)
+        
+        errors = [self._receive(worker_id) for worker_id in active]
+        for error in errors:
+            if error is not None:
+                raise error
+        
+        # Reduce the shard updates in worker order
+        for total, gradient in zip(self._totals, self._gradients[active[0]]):
+            np.copyto(total, gradient)
+        for worker_id in active[1:]:
+            for total, gradient in zip(self._totals, self._gradients[worker_id]):
+                total += gradient
+        
+        self.network.apply_gradients(self._totals, batch_size)
+    
+    def _receive(self, worker_id):
+        """Wait for a worker's reply, raising RuntimeError if the worker has died"""
+        conn, worker = self._conns[worker_id], self._workers[worker_id]
+        while not conn.poll(self.POLL_INTERVAL):
+            if not worker.is_alive():
+                # A reply may have arrived just before the worker exited
+                if conn.poll():
+                    break
+                raise self._worker_died(worker_id)
+        try:
+            return conn.recv()
+        except EOFError:
+            raise self._worker_died(worker_id)
+    
+    def _worker_died(self, worker_id):
+        worker = self._workers[worker_id]
+        worker.join(self.POLL_INTERVAL)
+        return RuntimeError(f"parallel training worker {worker_id} (pid {worker.pid}) "
+                            f"died with exit code {worker.exitcode}")
+    
+    def close(self):
+        """Stop the workers and give the network private copies of its weights"""
+        for name, array in self.network.parameters():
+            self.network.set_parameter(name, np.array(array))
+        
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for worker in self._workers:
+            worker.join()
+        
+        self._inputs = self._targets = self._gradients = self._totals = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+        self._workers = []
+        self._conns = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _random_batches(num_batches, batch_size, input_nodes, output_nodes, seed):
+    rng = np.random.default_rng(seed)
+    inputs = rng.random((num_batches * batch_size, input_nodes)) * 0.99 + 0.01
+    targets = MNISTDataLoader.create_targets(rng.integers(0, output_nodes, len(inputs)), output_nodes)
+    return [(inputs[i:i + batch_size], targets[i:i + batch_size])
+            for i in range(0, len(inputs), batch_size)]
+
+
+def verify_parallel_training(num_workers=2, num_batches=20, batch_size=64, seed=0,
+                             rtol=1e-9, atol=1e-12, dtype=np.float64, hidden_nodes=100, bias=False,
+                             optimizer_factory=None):
+    """Check that data-parallel training matches single-process training
+    
+    Two networks are created from the same seed and trained on the same
+    batches, one with train_batch and one with ParallelTrainer. Each network
+    gets its own optimizer from optimizer_factory (plain SGD when None), so
+    stateful optimizers are compared too. Raises AssertionError if the final
+    weights differ beyond the tolerances and returns the largest absolute
+    difference otherwise.
+    """
+    batches = _random_batches(num_batches, batch_size, 784, 10, seed)
+    
+    def create_network():
+        np.random.seed(seed)
+        optimizer = optimizer_factory() if optimizer_factory else None
+        return NeuralNetwork(784, hidden_nodes, 10, 0.3, dtype, bias=bias, optimizer=optimizer)
+    
+    single = create_network()
+    parallel = create_network()
+    if single.optimizer is parallel.optimizer:
+        raise ValueError("optimizer_factory must return a new optimizer on every call")
+    
+    for inputs, targets in batches:
+        single.train_batch(inputs, targets)
+    with ParallelTrainer(parallel, num_workers, batch_size) as trainer:
+        for inputs, targets in batches:
+            trainer.train_batch(inputs, targets)
+    
+    max_diff = 0.0
+    for (name, expected), (_, actual) in zip(single.parameters(), parallel.parameters()):
+        if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+            raise AssertionError(f"{name} differs by up to {np.max(np.abs(actual - expected)):.3e}")
+        max_diff = max(max_diff, float(np.max(np.abs(actual - expected))))
+    return max_diff
+
+
+def benchmark(worker_counts=(1, 2, 4), num_batches=50, batch_size=256, hidden_nodes=200, seed=0):
+    """Time one pass over the same batches with each number of workers"""
+    batches = _random_batches(num_batches, batch_size, 784, 10, seed)
+    results = {}
+    
+    np.random.seed(seed)
+    network = NeuralNetwork(784, hidden_nodes, 10, 0.3)
+    start = time.perf_counter()
+    for inputs, targets in batches:
+        network.train_batch(inputs, targets)
+    results['single process'] = time.perf_counter() - start
+    
+    for num_workers in worker_counts:
+        np.random.seed(seed)
+        network = NeuralNetwork(784, hidden_nodes, 10, 0.3)
+        with ParallelTrainer(network, num_workers, batch_size) as trainer:
+            start = time.perf_counter()
+            for inputs, targets in batches:
+                trainer.train_batch(inputs, targets)
+            results[f"{num_workers} workers"] = time.perf_counter() - start
+    
+    return results
+
+
+if __name__ == "__main__":
+    print(f"Max weight difference vs single process: {verify_parallel_training():.3e}")
+    for label, seconds in benchmark().items():
+        print(f"{label:>15}: {seconds:.3f}s")
@@ -0,0 +1,31 @@
+import os
+import sys
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest import mock
+
+import pytest
+
+
+class FakePool:
+    """ConnectionPool stand-in that hands out one mock connection and records releases"""
+    
+    size = 2
+    
+    def __init__(self):
+        self.connection = mock.MagicMock()
+        self.connection.autocommit = True
+        self.released = []
+    
+    def get_connection(self):
+        return self.connection
+    
+    def release(self, connection):
+        self.released.append(connection)
+
+
+@pytest.fixture
+def fake_pool():
+    return FakePool()
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from AsyncMySqlHelper import AsyncMySqlHelper
+
+
+def test_rollback_after_insert_many_commits_nothing(fake_pool):
+    connection = fake_pool.connection
+    db = AsyncMySqlHelper(pool=fake_pool)
+    
+    async def run():
+        async with db.transaction() as tx:
+            assert await tx.insert_many('movies', [{'title': 'a'}, {'title': 'b'}]) == 2
+            # Still inside the transaction: nothing committed, autocommit still off
+            assert connection.commit.call_count == 0
+            assert connection.autocommit is False
+            raise RuntimeError("abort")
+    
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+    finally:
+        db._executor.shutdown()
+    
+    assert connection.commit.call_count == 0
+    connection.rollback.assert_called_once_with()
+    assert connection.autocommit is True
+    assert fake_pool.released == [connection]
+
+
+def test_gather_inside_transaction_uses_connection_from_one_thread_at_a_time(fake_pool):
+    connection = fake_pool.connection
+    cursor = connection.cursor.return_value
+    cursor.fetchall.return_value = [{'id': 1}]
+    cursor.rowcount = 1
+    state = {'active': 0, 'max_active': 0}
+    lock = threading.Lock()
+    
+    def slow_execute(*args, **kwargs):
+        with lock:
+            state['active'] += 1
+            state['max_active'] = max(state['max_active'], state['active'])
+        time.sleep(0.02)
+        with lock:
+            state['active'] -= 1
+    
+    cursor.execute.side_effect = slow_execute
+    db = AsyncMySqlHelper(pool=fake_pool, max_workers=4)
+    
+    async def run():
+        async with db.transaction() as tx:
+            return await asyncio.gather(
+                tx.execute_query("UPDATE movies SET rating = 9 WHERE id = 1"),
+                tx.fetch_all("SELECT * FROM movies"),
+                tx.fetch_one("SELECT * FROM movies WHERE id = 1"),
+                tx.fetch_all("SELECT * FROM users"),
+            )
+    
+    try:
+        results = asyncio.run(run())
+    finally:
+        db._executor.shutdown()
+    
+    assert cursor.execute.call_count == 4
+    assert state['max_active'] == 1
+    assert results[1] == [{'id': 1}]
+    connection.commit.assert_called_once_with()
@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import neural_network
+from neural_network import NeuralNetwork
+
+
+def make_network(seed=0):
+    np.random.seed(seed)
+    return NeuralNetwork(20, (8, 6), 4, 0.1, np.float64, bias=True, optimizer='nesterov')
+
+
+def train(network, seed=1, steps=3):
+    rng = np.random.default_rng(seed)
+    for _ in range(steps):
+        network.train_batch(rng.random((5, 20)), np.eye(4)[rng.integers(0, 4, 5)])
+
+
+def assert_same_parameters(a, b):
+    for (name, expected), (_, actual) in zip(a.parameters(), b.parameters()):
+        np.testing.assert_array_equal(actual, expected, err_msg=name)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    network = make_network()
+    train(network)
+    network.epoch_list, network.loss_list, network.accuracy_list = [0], [0.5], [0.25]
+    network.save(tmp_path)
+    
+    loaded = NeuralNetwork.load(tmp_path)
+    assert_same_parameters(network, loaded)
+    assert loaded.epoch_list == [0]
+    assert loaded.optimizer.iterations == network.optimizer.iterations
+
+
+def test_interrupted_save_keeps_previous_checkpoint(tmp_path, monkeypatch):
+    network = make_network()
+    network.save(tmp_path)
+    saved = NeuralNetwork.load(tmp_path)
+    
+    train(network)
+    calls = []
+    real_save = np.save
+    
+    def failing_save(f, array):
+        calls.append(array)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        real_save(f, array)
+    
+    monkeypatch.setattr(neural_network.np, 'save', failing_save)
+    with pytest.raises(KeyboardInterrupt):
+        network.save(tmp_path)
+    monkeypatch.undo()
+    
+    # The partly written files are not referenced, so the old checkpoint loads unchanged
+    assert_same_parameters(saved, NeuralNetwork.load(tmp_path))
+
+
+def test_resave_over_loaded_checkpoint(tmp_path):
+    make_network().save(tmp_path)
+    
+    # The loaded weights are memory maps of the checkpoint's own files
+    network = NeuralNetwork.load(tmp_path)
+    train(network)
+    network.save(tmp_path)
+    
+    assert_same_parameters(network, NeuralNetwork.load(tmp_path))
+    with open(tmp_path / 'model.json') as f:
+        listed = set(json.load(f)['files'].values())
+    assert {name for name in os.listdir(tmp_path) if name.endswith('.npy')} == listed
+
+
+def test_load_legacy_checkpoint(tmp_path):
+    np.random.seed(0)
+    network = NeuralNetwork(20, 8, 4, 0.3, np.float64)
+    np.save(tmp_path / 'weights_input_hidden.npy', network.weights_input_hidden)
+    np.save(tmp_path / 'weights_hidden_output.npy', network.weights_hidden_output)
+    with open(tmp_path / 'model.json', 'w') as f:
+        json.dump({'input_nodes': 20, 'hidden_nodes': 8, 'output_nodes': 4, 'learning_rate': 0.3,
+                   'epoch_list': [], 'loss_list': [], 'accuracy_list': []}, f)
+    
+    assert_same_parameters(network, NeuralNetwork.load(tmp_path))
+
+
+def test_save_leaves_other_files_alone(tmp_path):
+    np.save(tmp_path / 'mnist_train.npy', np.arange(3))
+    np.save(tmp_path / 'weights.npy', np.arange(3))
+    (tmp_path / 'notes.txt').write_text('keep me')
+    
+    network = make_network()
+    network.save(tmp_path)
+    train(network)
+    network.save(tmp_path)
+    
+    with open(tmp_path / 'model.json') as f:
+        listed = set(json.load(f)['files'].values())
+    assert set(os.listdir(tmp_path)) == listed | {'model.json', 'mnist_train.npy', 'weights.npy', 'notes.txt'}
+
+
+def test_save_removes_files_of_interrupted_save_and_old_optimizer(tmp_path, monkeypatch):
+    network = make_network()
+    network.save(tmp_path)
+    
+    calls = []
+    real_save = np.save
+    
+    def failing_save(f, array):
+        calls.append(array)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        real_save(f, array)
+    
+    # A partial save, then a save with an optimizer that has other state arrays
+    monkeypatch.setattr(neural_network.np, 'save', failing_save)
+    with pytest.raises(KeyboardInterrupt):
+        network.save(tmp_path)
+    monkeypatch.undo()
+    
+    np.random.seed(0)
+    adam = NeuralNetwork(20, (8, 6), 4, 0.1, np.float64, bias=True, optimizer='adam')
+    train(adam)
+    adam.save(tmp_path)
+    
+    with open(tmp_path / 'model.json') as f:
+        listed = set(json.load(f)['files'].values())
+    assert {name for name in os.listdir(tmp_path) if name.endswith('.npy')} == listed
+    assert not any(name.startswith('velocity_') for name in listed)
@@ -0,0 +1,131 @@
+import datetime
+import threading
+import time
+from unittest import mock
+
+from DashboardRollups import DashboardRollups
+
+
+def make_db(last_id, max_id, cutoff, indexed=()):
+    def fetch_one(query, params=None, **kwargs):
+        if 'information_schema' in query:
+            return {'found': 1} if params in indexed else None
+        if 'rollup_state' in query:
+            return {'last_id': last_id}
+        return {'max_id': max_id, 'cutoff': cutoff}
+    
+    db = mock.MagicMock()
+    db.fetch_one.side_effect = fetch_one
+    db.execute_query.return_value = 1
+    db.update.return_value = 1
+    return db
+
+
+def executed(db):
+    return [(' '.join(c.args[0].split()), c.args[1] if len(c.args) > 1 else None)
+            for c in db.execute_query.call_args_list]
+
+
+def test_refresh_reaggregates_recent_days_up_to_max_id():
+    cutoff = datetime.date(2026, 10, 16)
+    db = make_db(last_id=100, max_id=150, cutoff=cutoff)
+    rollups = DashboardRollups(db, recent_days=3)
+    
+    assert rollups._refresh_one('sales_daily_rollup', rebuild=False)
+    
+    (delete, params), (incremental, inc_params), (window, window_params) = executed(db)
+    assert delete == "DELETE FROM sales_daily_rollup WHERE sales_date >= %s" and params == (cutoff,)
+    # Older dates only take the new rows
+    assert "id > %s AND id <= %s AND sales_date < %s" in incremental
+    assert inc_params == (100, 150, cutoff)
+    # Recent dates are rebuilt from every row up to max_id, so a row with an id
+    # below last_id that committed after the previous refresh is still counted
+    assert "id <= %s AND sales_date >= %s" in window
+    assert window_params == (150, cutoff)
+    db.update.assert_called_once_with('rollup_state', {'last_id': 150}, 'rollup_name = %s',
+                                      ('sales_daily_rollup',))
+    db.commit.assert_called_once()
+
+
+def test_refresh_window_uses_source_date_column():
+    db = make_db(last_id=0, max_id=10, cutoff=datetime.date(2026, 10, 16))
+    assert DashboardRollups(db)._refresh_one('behavior_daily_rollup', rebuild=False)
+    
+    (delete, _), (incremental, _), (window, _) = executed(db)
+    assert delete.endswith("WHERE action_date >= %s")
+    assert "action_time < %s" in incremental and "action_time >= %s" in window
+
+
+def test_rebuild_clears_whole_rollup():
+    db = make_db(last_id=100, max_id=150, cutoff=datetime.date(2026, 10, 16))
+    assert DashboardRollups(db)._refresh_one('sales_daily_rollup', rebuild=True)
+    
+    (delete, params), (_, inc_params), _ = executed(db)
+    assert delete == "DELETE FROM sales_daily_rollup" and params == ()
+    assert inc_params[0] == 0
+
+
+def test_failed_step_rolls_back():
+    db = make_db(last_id=0, max_id=10, cutoff=datetime.date(2026, 10, 16))
+    db.execute_query.side_effect = [1, None]
+    assert not DashboardRollups(db)._refresh_one('sales_daily_rollup', rebuild=False)
+    db.rollback.assert_called_once()
+    db.update.assert_not_called()
+    db.commit.assert_not_called()
+
+
+def test_ensure_tables_only_reports_missing_indexes(capsys):
+    db = make_db(0, 0, None, indexed={('sales_data', 'sales_date')})
+    rollups = DashboardRollups(db)
+    
+    assert rollups.ensure_tables()
+    assert rollups.missing_date_indexes() == [('user_behavior', 'action_time')]
+    assert not any('CREATE INDEX' in query for query, _ in executed(db))
+    assert 'user_behavior.action_time' in capsys.readouterr().out
+
+
+def test_create_date_indexes_skips_indexed_tables():
+    db = make_db(0, 0, None, indexed={('sales_data', 'sales_date')})
+    assert DashboardRollups(db).create_date_indexes()
+    assert [query for query, _ in executed(db)] == [
+        "CREATE INDEX idx_user_behavior_action_time ON user_behavior (action_time)"
+    ]
+
+
+def test_refresh_if_stale_refreshes_once_for_concurrent_callers():
+    rollups = DashboardRollups(mock.MagicMock(), refresh_interval=60)
+    calls = []
+    
+    def slow_refresh(rebuild):
+        calls.append(rebuild)
+        time.sleep(0.2)
+        rollups._last_refresh = time.monotonic()
+        return True
+    
+    rollups._refresh_all = slow_refresh
+    threads = [threading.Thread(target=rollups.refresh_if_stale) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert calls == [False]
+    assert not rollups.refresh_if_stale()
+
+
+def test_background_refresh():
+    rollups = DashboardRollups(mock.MagicMock(), refresh_interval=0.05)
+    refreshed = threading.Event()
+    
+    def refresh_all(rebuild):
+        rollups._last_refresh = time.monotonic()
+        refreshed.set()
+        return True
+    
+    rollups._refresh_all = refresh_all
+    rollups.start()
+    try:
+        assert refreshed.wait(2)
+    finally:
+        rollups.stop(timeout=2)
+    assert rollups._thread is None
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from neural_network import NeuralNetwork
+
+
+def loss(network, inputs, targets):
+    """The loss whose negative gradient compute_gradients() returns, summed over the batch"""
+    outputs = network.predict_proba(inputs)
+    if network.output_activation.cross_entropy:
+        return -np.sum(targets * np.log(outputs))
+    return 0.5 * np.sum((targets - outputs) ** 2)
+
+
+def numerical_updates(network, inputs, targets, eps=1e-6):
+    updates = []
+    for _, parameter in network.parameters():
+        update = np.empty_like(parameter)
+        for index in np.ndindex(parameter.shape):
+            original = parameter[index]
+            parameter[index] = original + eps
+            plus = loss(network, inputs, targets)
+            parameter[index] = original - eps
+            minus = loss(network, inputs, targets)
+            parameter[index] = original
+            update[index] = -(plus - minus) / (2 * eps)
+        updates.append(update)
+    return updates
+
+
+def make_batch(seed=1, batch_size=7, input_nodes=6, output_nodes=4):
+    rng = np.random.default_rng(seed)
+    return rng.random((batch_size, input_nodes)), np.eye(output_nodes)[rng.integers(0, output_nodes, batch_size)]
+
+
+@pytest.mark.parametrize('hidden_nodes, hidden_activation, output_activation, bias', [
+    ((5, 3), 'sigmoid', 'sigmoid', False),
+    ((5, 3), 'sigmoid', 'sigmoid', True),
+    ((5, 4, 3), 'tanh', 'softmax', True),
+    ((5, 3), 'relu', 'sigmoid', True),
+    # With a cross-entropy output the output deltas are the errors, so the
+    # single-hidden-layer rule is the exact gradient too
+    (5, 'tanh', 'softmax', True),
+])
+def test_gradients_match_finite_differences(hidden_nodes, hidden_activation, output_activation, bias):
+    np.random.seed(0)
+    network = NeuralNetwork(6, hidden_nodes, 4, 0.1, np.float64, hidden_activation=hidden_activation,
+                            output_activation=output_activation, bias=bias)
+    if bias:
+        for name, parameter in network.parameters():
+            if name.startswith('bias'):
+                parameter[...] = np.random.normal(0.0, 0.5, parameter.shape)
+    inputs, targets = make_batch()
+    
+    expected = numerical_updates(network, inputs, targets)
+    actual = network.compute_gradients(inputs, targets)
+    
+    for (name, _), gradient, numerical in zip(network.parameters(), actual, expected):
+        np.testing.assert_allclose(gradient, numerical, rtol=1e-6, atol=1e-8, err_msg=name)
+
+
+def test_single_hidden_layer_keeps_original_update_rule():
+    np.random.seed(0)
+    network = NeuralNetwork(6, 5, 4, 0.1, np.float64)
+    inputs, targets = make_batch()
+    weights_input_hidden, weights_hidden_output = (layer.weights for layer in network.layers)
+    
+    # The original two-matrix network: the output errors, not the output
+    # deltas, are passed back to the hidden layer
+    hidden = 1 / (1 + np.exp(-inputs @ weights_input_hidden.T))
+    outputs = 1 / (1 + np.exp(-hidden @ weights_hidden_output.T))
+    output_errors = targets - outputs
+    hidden_errors = output_errors @ weights_hidden_output
+    expected = [((hidden_errors * hidden * (1 - hidden)).T @ inputs),
+                ((output_errors * outputs * (1 - outputs)).T @ hidden)]
+    
+    for gradient, original in zip(network.compute_gradients(inputs, targets), expected):
+        np.testing.assert_allclose(gradient, original, rtol=1e-12)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+import week2_revised
+from week2_revised import HotSearchCollector, MySQLDatabase
+
+
+@pytest.fixture
+def helper(monkeypatch):
+    helper = mock.MagicMock()
+    helper.bulk_insert.return_value = 1
+    monkeypatch.setattr(week2_revised.MySqlHelper, 'from_connection', lambda *args, **kwargs: helper)
+    return helper
+
+
+def snapshot_rows(helper):
+    (table, rows), _ = helper.bulk_insert.call_args
+    assert table == 'hot_snapshots'
+    return rows
+
+
+def test_long_titles_are_looked_up_by_stored_form(helper):
+    long_title = '长' * 300
+    stored = '长' * MySQLDatabase.TITLE_LENGTH
+    helper.fetch_all.return_value = [{'requested': stored, 'id': 7}, {'requested': 'b', 'id': 8}]
+    db = MySQLDatabase()
+    
+    assert db.get_title_ids([long_title, ' b ']) == {long_title: 7, ' b ': 8}
+    
+    (_, inserted), _ = helper.bulk_insert.call_args
+    assert inserted == [{'title': stored}, {'title': 'b'}]
+    (_, params), _ = helper.fetch_all.call_args
+    assert params == (stored, 'b')
+
+
+def test_unmatched_titles_are_skipped_and_snapshots_flushed(helper, capsys):
+    # The database returns nothing for 'B', e.g. because it collates it onto another title
+    helper.fetch_all.return_value = [{'requested': 'a', 'id': 1}]
+    db = MySQLDatabase()
+    db.ensure_connection = lambda: True
+    collector = HotSearchCollector(spider=mock.MagicMock(), db=db)
+    crawl_time = datetime(2026, 10, 18, 12, 0, 0)
+    collector.pending = [(crawl_time, [(1, 'a', 100), (2, 'B', 90)])]
+    
+    assert collector.flush()
+    assert collector.pending == []
+    assert snapshot_rows(helper) == [
+        {'crawl_time': crawl_time, 'hot_rank': 1, 'title_id': 1, 'hot_index': 100}
+    ]
+    assert "已跳过: B" in capsys.readouterr().out
+
+
+def test_title_ids_are_cached(helper):
+    helper.fetch_all.return_value = [{'requested': 'a', 'id': 1}]
+    db = MySQLDatabase()
+    db.get_title_ids(['a'])
+    helper.reset_mock()
+    
+    assert db.get_title_ids(['a ']) == {'a ': 1}
+    helper.bulk_insert.assert_not_called()
+    helper.fetch_all.assert_not_called()
+
+
+def test_title_lookup_ends_its_read_transaction(helper):
+    helper.fetch_all.return_value = [{'requested': 'a', 'id': 1}]
+    db = MySQLDatabase()
+    db.get_title_ids(['a'])
+    
+    helper.commit.assert_called_once_with()
+
+
+def test_title_id_cache_evicts_least_recently_used(helper, monkeypatch):
+    monkeypatch.setattr(MySQLDatabase, 'TITLE_CACHE_SIZE', 2)
+    db = MySQLDatabase()
+    for title, title_id in [('a', 1), ('b', 2)]:
+        helper.fetch_all.return_value = [{'requested': title, 'id': title_id}]
+        db.get_title_ids([title])
+    db.get_title_ids(['a'])
+    helper.fetch_all.return_value = [{'requested': 'c', 'id': 3}]
+    
+    assert db.get_title_ids(['c']) == {'c': 3}
+    assert list(db._title_ids) == ['a', 'c']
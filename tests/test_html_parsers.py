@@ -0,0 +1,67 @@
+import importlib
+import os
+
+import pytest
+
+from HtmlParsers import BeautifulSoupParser, available_parsers, get_parser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+# bs4 is a hard dependency, so it is the reference the other backends are compared with
+OTHER_PARSERS = [name for name in available_parsers() if name != BeautifulSoupParser.name]
+
+
+def test_douban_items_reference():
+    items = BeautifulSoupParser().douban_items(read_fixture('douban_top250.html'))
+    
+    assert [item['rank'] for item in items] == ['1', '2', '3']
+    assert items[0]['title'] == '肖申克的救赎'
+    assert items[0]['rating'] == '9.7'
+    assert items[0]['rating_count'] == '3188263人评价'
+    assert items[0]['quote'] == '希望让人自由。'
+    assert items[0]['link'] == 'https://movie.douban.com/subject/1292052/'
+    assert '1994\xa0/\xa0美国' in items[0]['info']
+    # The third movie has no quote
+    assert items[2]['quote'] is None
+
+
+def test_baidu_items_reference():
+    items = BeautifulSoupParser().baidu_items(read_fixture('baidu_hot.html'))
+    
+    assert items == [
+        ('天宫空间站完成新一轮出舱任务', '7904235'),
+        ('各地秋收进度过半 & 粮食产量稳中有增', '7,512,088'),
+        ('冷空气来袭多地降温超10℃', '496万'),
+        ('没有热搜指数的推广条目', None),
+    ]
+
+
+@pytest.mark.parametrize('name', OTHER_PARSERS)
+def test_douban_items_match_bs4(name):
+    page = read_fixture('douban_top250.html')
+    assert get_parser(name).douban_items(page) == BeautifulSoupParser().douban_items(page)
+
+
+@pytest.mark.parametrize('name', OTHER_PARSERS)
+def test_baidu_items_match_bs4(name):
+    page = read_fixture('baidu_hot.html')
+    assert get_parser(name).baidu_items(page) == BeautifulSoupParser().baidu_items(page)
+
+
+@pytest.mark.parametrize('name', available_parsers())
+def test_douban_movies_are_identical_across_backends(name):
+    spider_module = importlib.import_module('第三周任务')
+    page = read_fixture('douban_top250.html')
+    
+    movies = spider_module.DoubanMovieSpider(parser=name, cache_dir=None).parse_page(page)
+    expected = spider_module.DoubanMovieSpider(parser='bs4', cache_dir=None).parse_page(page)
+    
+    assert movies == expected
+    assert movies[1]['director'] == '陈凯歌 Kaige Chen'
+    assert movies[1]['rating_count'] == 2337515
@@ -0,0 +1,103 @@
+import http.client
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from HttpClient import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+    
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.path.endswith('/old'):
+            self.send_response(302)
+            self.send_header('Location', 'new?from=old')
+            body = b''
+        elif self.path.startswith('/loop'):
+            self.send_response(301)
+            self.send_header('Location', '/loop')
+            body = b''
+        else:
+            self.send_response(200)
+            body = f"page {self.path}".encode('utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_connections_are_reused_across_thread_pools(server):
+    client = HttpClient()
+    urls = [f"{base_url(server)}/top250?start={start}" for start in range(0, 250, 25)]
+    
+    # Each crawl uses its own executor, as DoubanMovieSpider.crawl_top100 does
+    for _ in range(3):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            bodies = list(executor.map(client.fetch, urls))
+        assert bodies[1] == b"page /top250?start=25"
+    
+    assert server.requests == 30
+    assert server.connections <= 4
+    client.close()
+    assert not client._idle
+
+
+def test_spider_reuses_connections_between_crawls(server):
+    spider_module = importlib.import_module('第三周任务')
+    spider = spider_module.DoubanMovieSpider(f"{base_url(server)}/top250", workers=4, rate=0,
+                                             cache_dir=None)
+    spider.crawl_top100(pages=4)
+    spider.crawl_top100(pages=4)
+    spider.close()
+    
+    assert server.requests == 8
+    assert server.connections <= 4
+    assert not spider.client._idle
+
+
+def test_follows_relative_redirect(server):
+    client = HttpClient()
+    status, _, body = client.request(f"{base_url(server)}/dir/old")
+    assert status == 200
+    assert body == b"page /dir/new?from=old"
+    assert client.get_text(f"{base_url(server)}/dir/old") == "page /dir/new?from=old"
+    client.close()
+
+
+def test_redirect_loop_raises(server):
+    client = HttpClient(max_redirects=3)
+    with pytest.raises(http.client.HTTPException, match="more than 3 redirects"):
+        client.request(f"{base_url(server)}/loop")
+    assert server.requests == 4
+    client.close()
@@ -0,0 +1,60 @@
+import importlib
+from unittest import mock
+
+import pytest
+
+spider_module = importlib.import_module('第三周任务')
+MovieDatabase = spider_module.MovieDatabase
+
+
+def make_movie(rank, link):
+    return {'rank': rank, 'title': f"movie {rank}", 'rating': 9.0, 'rating_count': 100,
+            'director': '', 'actors': '', 'year': 2000, 'country': '', 'movie_type': '',
+            'quote': '', 'link': link}
+
+
+@pytest.fixture
+def helper(monkeypatch):
+    helper = mock.MagicMock()
+    helper.fetch_all.return_value = []
+    helper.bulk_insert.side_effect = lambda table, rows, **kwargs: len(rows)
+    monkeypatch.setattr(spider_module.MySqlHelper, 'from_connection', lambda *args, **kwargs: helper)
+    return helper
+
+
+def test_movies_without_unique_link_are_skipped(helper, capsys):
+    movies = [make_movie(1, 'https://movie.douban.com/subject/1/'), make_movie(2, ''),
+              make_movie(3, None), make_movie(4, 'https://movie.douban.com/subject/1/'),
+              make_movie(5, 'https://movie.douban.com/subject/5/')]
+    
+    assert MovieDatabase().save_movies(movies)
+    
+    (_, rows), kwargs = helper.bulk_insert.call_args
+    assert [row['movie_rank'] for row in rows] == [1, 5]
+    assert '跳过 3 部' in capsys.readouterr().out
+    helper.commit.assert_called_once()
+
+
+def test_changed_movies_get_new_crawl_time(helper):
+    movie = make_movie(1, 'https://movie.douban.com/subject/1/')
+    helper.fetch_all.return_value = [{'link': movie['link'], 'row_hash': 'stale'}]
+    
+    assert MovieDatabase().save_movies([movie])
+    
+    (_, rows), kwargs = helper.bulk_insert.call_args
+    assert rows[0]['crawl_time'] is not None
+    assert 'crawl_time' in kwargs['update_columns']
+
+
+def test_legacy_table_is_cleaned_before_adding_unique_key():
+    database = MovieDatabase()
+    database.connection = mock.MagicMock()
+    cursor = database.connection.cursor.return_value
+    cursor.fetchall.return_value = []
+    
+    assert database.create_database()
+    
+    statements = [' '.join(call.args[0].split()) for call in cursor.execute.call_args_list]
+    alter = next(i for i, sql in enumerate(statements) if sql.startswith('ALTER TABLE movies'))
+    assert statements[alter - 2] == "DELETE FROM movies WHERE link IS NULL OR link = ''"
+    assert statements[alter - 1].startswith("DELETE newer FROM movies AS newer JOIN movies AS older")
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from mysql.connector import Error
+
+import MySqlHelper as MySqlHelper_module
+from MySqlHelper import MySqlHelper
+
+
+def test_bulk_insert_reports_failed_commit_in_pooled_mode(fake_pool, capsys):
+    connection = fake_pool.connection
+    connection.commit.side_effect = Error(msg="Lost connection to MySQL server during query")
+    helper = MySqlHelper(pool=fake_pool)
+    
+    assert helper.bulk_insert('movies', [{'title': 'a'}, {'title': 'b'}], max_packet=1 << 20) is None
+    
+    # The database error is reported instead of an AttributeError from rollback()
+    assert "Lost connection" in capsys.readouterr().out
+    assert fake_pool.released == [connection]
+    assert not helper.in_transaction
+
+
+def test_rollback_without_transaction_is_noop_in_pooled_mode(fake_pool):
+    helper = MySqlHelper(pool=fake_pool)
+    helper.rollback()
+    assert not helper.in_transaction
+
+
+def test_commit_without_transaction_is_noop_in_pooled_mode(fake_pool):
+    helper = MySqlHelper(pool=fake_pool)
+    helper.commit()
+    assert not helper.in_transaction
+    assert fake_pool.released == []
+    fake_pool.connection.commit.assert_not_called()
+
+
+def stream_cursor(connection, batches):
+    cursor = connection.cursor.return_value
+    cursor.fetchmany.side_effect = batches
+    return cursor
+
+
+def test_iter_rows_early_exit_discards_pooled_connection(fake_pool):
+    connection = fake_pool.connection
+    cursor = stream_cursor(connection, [[{'id': i} for i in range(10)]] * 1000)
+    helper = MySqlHelper(pool=fake_pool)
+    
+    rows = helper.iter_rows("SELECT id FROM big", batch_size=10)
+    assert [row['id'] for _, row in zip(range(3), rows)] == [0, 1, 2]
+    rows.close()
+    
+    # The rest of the result set is not read; the connection is cut and handed back
+    assert cursor.fetchmany.call_count == 1
+    connection.shutdown.assert_called_once()
+    assert fake_pool.released == [connection]
+
+
+def test_iter_rows_early_exit_kills_query_on_single_connection(monkeypatch):
+    connection = mock.MagicMock(connection_id=42)
+    cursor = stream_cursor(connection, [[(1,)], [(2,)], Error(msg="Query execution was interrupted")])
+    killer = mock.MagicMock()
+    connect = mock.MagicMock(return_value=killer)
+    monkeypatch.setattr(MySqlHelper_module.mysql.connector, 'connect', connect)
+    helper = MySqlHelper(host='db', user='u', password='p')
+    helper.connection = connection
+    
+    for row in helper.iter_rows("SELECT id FROM big", row_format='tuple'):
+        break
+    
+    assert connect.call_args.kwargs['host'] == 'db'
+    killer.cursor.return_value.execute.assert_called_once_with("KILL QUERY %s", (42,))
+    connection.shutdown.assert_not_called()
+    cursor.close.assert_called_once()
+
+
+def test_iter_rows_early_exit_drains_caller_connection():
+    connection = mock.MagicMock()
+    cursor = stream_cursor(connection, [[(1,)], [(2,)], []])
+    helper = MySqlHelper.from_connection(connection)
+    
+    for row in helper.iter_rows("SELECT id FROM big", row_format='tuple'):
+        break
+    
+    assert cursor.fetchmany.call_count == 3
+    connection.shutdown.assert_not_called()
@@ -0,0 +1,78 @@
+import os
+import signal
+import time
+
+import numpy as np
+import pytest
+
+from neural_network import NeuralNetwork
+from optimizers import SGD, Adam
+from parallel_trainer import ParallelTrainer, verify_parallel_training
+
+OPTIMIZER_FACTORIES = {
+    'sgd': None,
+    'nesterov': lambda: SGD(0.1, momentum=0.9, nesterov=True),
+    'adam': lambda: Adam(0.001),
+}
+
+
+@pytest.mark.parametrize('bias', [False, True])
+@pytest.mark.parametrize('optimizer', sorted(OPTIMIZER_FACTORIES))
+def test_parallel_training_matches_single_process(bias, optimizer):
+    max_diff = verify_parallel_training(num_workers=2, num_batches=6, batch_size=32, hidden_nodes=16,
+                                        bias=bias, optimizer_factory=OPTIMIZER_FACTORIES[optimizer])
+    assert max_diff < 1e-12
+
+
+def test_parallel_training_matches_with_several_hidden_layers():
+    assert verify_parallel_training(num_workers=3, num_batches=4, batch_size=30, hidden_nodes=(16, 8),
+                                    bias=True, optimizer_factory=OPTIMIZER_FACTORIES['adam']) < 1e-12
+
+
+def test_shared_optimizer_is_rejected():
+    optimizer = Adam(0.001)
+    with pytest.raises(ValueError, match="new optimizer"):
+        verify_parallel_training(num_batches=1, hidden_nodes=4, optimizer_factory=lambda: optimizer)
+
+
+def test_uneven_shards_and_private_weights_after_close():
+    rng = np.random.default_rng(1)
+    inputs = rng.random((10, 6))
+    targets = np.eye(3)[rng.integers(0, 3, 10)]
+    
+    np.random.seed(0)
+    single = NeuralNetwork(6, 5, 3, 0.3, np.float64, bias=True)
+    np.random.seed(0)
+    parallel = NeuralNetwork(6, 5, 3, 0.3, np.float64, bias=True)
+    
+    # 4 workers for 3 samples leaves one worker without a shard
+    single.train_batch(inputs[:3], targets[:3])
+    single.train_batch(inputs, targets)
+    with ParallelTrainer(parallel, num_workers=4, max_batch_size=10) as trainer:
+        trainer.train_batch(inputs[:3], targets[:3])
+        trainer.train_batch(inputs, targets)
+    
+    for (name, expected), (_, actual) in zip(single.parameters(), parallel.parameters()):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-14, err_msg=name)
+        # The shared memory is gone, so the weights must be ordinary arrays again
+        assert actual.base is None
+
+
+def test_dead_worker_raises_instead_of_hanging():
+    np.random.seed(0)
+    network = NeuralNetwork(6, 5, 3, 0.3, np.float64)
+    inputs, targets = np.random.random((8, 6)), np.eye(3)[np.arange(8) % 3]
+    
+    with ParallelTrainer(network, num_workers=2, max_batch_size=8) as trainer:
+        trainer.train_batch(inputs, targets)
+        worker = trainer._workers[1]
+        os.kill(worker.pid, signal.SIGKILL)
+        worker.join(5)
+        
+        start = time.monotonic()
+        # Dying before the task is sent, and while the parent waits for its reply
+        with pytest.raises(RuntimeError, match=r"worker 1 .* exit code -9"):
+            trainer.train_batch(inputs, targets)
+        with pytest.raises(RuntimeError, match=r"worker 1 .* exit code -9"):
+            trainer._receive(1)
+        assert time.monotonic() - start < 5
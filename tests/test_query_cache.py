@@ -0,0 +1,69 @@
+import pytest
+
+from MySqlHelper import MySqlHelper, QueryCache
+
+
+@pytest.mark.parametrize('query, tables', [
+    ("SELECT * FROM sales_data", {'sales_data'}),
+    ("SELECT * FROM sales_data s, products p WHERE s.product_id = p.id", {'sales_data', 'products'}),
+    ("SELECT * FROM `shop`.`sales_data` AS s,\n  products\nORDER BY s.sale_date", {'sales_data', 'products'}),
+    ("SELECT * FROM orders o JOIN users u ON o.user_id = u.id LEFT JOIN items i USING (item_id)",
+     {'orders', 'users', 'items'}),
+    ("SELECT * FROM (SELECT a FROM t1, t2) x, t3 WHERE x.a > 0", {'t1', 't2', 't3'}),
+    ("SELECT * FROM order_items GROUP BY order_id", {'order_items'}),
+])
+def test_tables_read(query, tables):
+    assert QueryCache.tables_read(query) == tables
+
+
+def test_write_to_comma_joined_table_invalidates():
+    cache = QueryCache()
+    query = "SELECT * FROM sales_data s, products p WHERE s.product_id = p.id"
+    key = QueryCache.make_key('all', query, ())
+    cache.put(key, query, [{'id': 1}])
+    
+    cache.invalidate(['products'])
+    assert cache.get(key) == (False, None)
+
+
+def test_make_key_collapses_whitespace_outside_quotes_only():
+    key = QueryCache.make_key
+    assert key('all', "SELECT *\n  FROM  t  WHERE a = 1", ()) == key('all', "SELECT * FROM t WHERE a = 1", ())
+    assert key('all', "SELECT * FROM t WHERE name = 'a  b'", ()) != key('all', "SELECT * FROM t WHERE name = 'a b'", ())
+    assert key('all', 'SELECT "x  y", \'it\'\'s  \' FROM t', ()) != key('all', 'SELECT "x y", \'it\'\'s \' FROM t', ())
+
+
+def test_tables_read_ignores_string_literals():
+    query = "SELECT * FROM notes n, users u WHERE n.body = 'copied (from archive), see x' AND u.id = n.user_id"
+    assert QueryCache.tables_read(query) == {'notes', 'users'}
+
+
+def test_make_key_includes_named_parameter_values():
+    key = QueryCache.make_key
+    query = "SELECT * FROM t WHERE id = %(id)s AND kind = %(kind)s"
+    assert key('all', query, {'id': 1, 'kind': 'a'}) != key('all', query, {'id': 2, 'kind': 'a'})
+    assert key('all', query, {'id': 1, 'kind': 'a'}) == key('all', query, {'kind': 'a', 'id': 1})
+
+
+def test_unhashable_params_are_not_cached(fake_pool):
+    assert QueryCache.make_key('all', "SELECT * FROM t WHERE id IN (%s)", ([1, 2],)) is None
+    
+    helper = MySqlHelper(pool=fake_pool, query_cache_size=8)
+    cursor = fake_pool.connection.cursor.return_value
+    cursor.fetchall.return_value = [{'id': 1}]
+    
+    for _ in range(2):
+        assert helper.fetch_all("SELECT * FROM t WHERE id = %(id)s", {'id': [1]}) == [{'id': 1}]
+    assert cursor.execute.call_count == 2
+
+
+def test_named_params_are_cached_per_value(fake_pool):
+    helper = MySqlHelper(pool=fake_pool, query_cache_size=8)
+    cursor = fake_pool.connection.cursor.return_value
+    cursor.fetchall.side_effect = lambda: [{'id': cursor.execute.call_args[0][1]['id']}]
+    
+    query = "SELECT * FROM t WHERE id = %(id)s"
+    assert helper.fetch_all(query, {'id': 1}) == [{'id': 1}]
+    assert helper.fetch_all(query, {'id': 2}) == [{'id': 2}]
+    assert helper.fetch_all(query, {'id': 1}) == [{'id': 1}]
+    assert cursor.execute.call_count == 2
@@ -6,30 +6,38 @@ class NetworkVisualizer:
         self.nn = neural_network
     
     def visualize_weights(self):
-        """Visualize weight matrices"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-        
-        # Input to hidden layer weights
-        im1 = ax1.imshow(self.nn.weights_input_hidden, cmap='coolwarm', aspect='auto')
-        ax1.set_title('Input to Hidden Layer Weights')
-        ax1.set_xlabel('Input Nodes')
-        ax1.set_ylabel('Hidden Nodes')
-        plt.colorbar(im1, ax=ax1)
-        
-        # Hidden to output layer weights
-        im2 = ax2.imshow(self.nn.weights_hidden_output, cmap='coolwarm', aspect='auto')
-        ax2.set_title('Hidden to Output Layer Weights')
-        ax2.set_xlabel('Hidden Nodes')
-        ax2.set_ylabel('Output Nodes')
-        plt.colorbar(im2, ax=ax2)
+        """Visualize the weight matrix of every layer"""
+        layers = self.nn.layers
+        fig, axes = plt.subplots(1, len(layers), figsize=(6 * len(layers), 5), squeeze=False)
+        
+        # Name the layers Input, Hidden (or Hidden 1, Hidden 2, ...) and Output
+        num_hidden = len(layers) - 1
+        if num_hidden == 1:
+            names = ['Input', 'Hidden', 'Output']
+        else:
+            names = ['Input'] + [f"Hidden {i}" for i in range(1, num_hidden + 1)] + ['Output']
+        
+        for ax, layer, source, target in zip(axes.flat, layers, names, names[1:]):
+            im = ax.imshow(layer.weights, cmap='coolwarm', aspect='auto')
+            ax.set_title(f"{source} to {target} Layer Weights")
+            ax.set_xlabel(f"{source} Nodes")
+            ax.set_ylabel(f"{target} Nodes")
+            plt.colorbar(im, ax=ax)
         
         plt.tight_layout()
         plt.show()
     
     def visualize_sample(self, sample_data, predicted=None):
-        """Visualize sample and prediction"""
-        digit = int(sample_data[0])
-        image_data = sample_data[1:]
+        """Visualize sample and prediction
+        
+        sample_data is either an (image, label) pair from a Dataset or a
+        label-first record.
+        """
+        if isinstance(sample_data, tuple):
+            image_data, digit = np.asarray(sample_data[0]), int(sample_data[1])
+        else:
+            digit = int(sample_data[0])
+            image_data = sample_data[1:]
         
         # Reshape to 28x28 image
         image = image_data.reshape(28, 28)
@@ -45,6 +53,26 @@ class NetworkVisualizer:
         plt.title(title)
         plt.axis('off')
         plt.show()
+    
+    def visualize_dataset(self, dataset, num_samples=16):
+        """Visualize the first samples of a Dataset with their predictions"""
+        num_samples = min(num_samples, len(dataset))
+        subset = dataset[:num_samples]
+        predicted = self.nn.predict_batch(subset.inputs(dtype=self.nn.dtype))
+        
+        cols = 4
+        rows = (num_samples + cols - 1) // cols
+        fig, axes = plt.subplots(rows, cols, figsize=(2 * cols, 2 * rows), squeeze=False)
+        
+        for i, ax in enumerate(axes.flat):
+            ax.axis('off')
+            if i >= num_samples:
+                continue
+            ax.imshow(np.asarray(subset.images[i]).reshape(28, 28), cmap='Greys', interpolation='None')
+            ax.set_title(f"{subset.labels[i]} -> {predicted[i]}")
+        
+        plt.tight_layout()
+        plt.show()
 
 # Usage example
 if __name__ == "__main__":
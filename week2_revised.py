@@ -1,43 +1,61 @@
-import urllib.request
-from bs4 import BeautifulSoup
+import argparse
 import mysql.connector
-import ssl
-from typing import List, Tuple, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from HtmlParsers import get_parser
+from HttpClient import HttpCache, HttpClient
+from MySqlHelper import MySqlHelper
+from typing import Dict, List, Tuple, Optional
 
 class BaiduHotSearch:
     """百度热搜爬虫类"""
     
-    def __init__(self):
+    def __init__(self, parser: str = None, cache_dir: Optional[str] = '.http_cache', max_age: float = 0):
+        """
+        Args:
+            parser: 解析后端名称，默认使用最快的可用后端
+            cache_dir: 响应缓存目录，为None时不缓存
+            max_age: 缓存新鲜期（秒）；热搜变化快，默认每次都向服务器发条件请求
+        """
         self.url = "https://top.baidu.com/board?tab=realtime"
         self.headers = {'User-Agent': 'Mozilla/5.0'}
-        # 跳过SSL验证
-        ssl._create_default_https_context = ssl._create_unverified_context
+        self.parser = get_parser(parser)
+        cache = HttpCache(cache_dir, max_age) if cache_dir else None
+        # 不校验SSL证书
+        self.client = HttpClient(self.headers, timeout=10, cache=cache)
+    
+    @staticmethod
+    def parse_hot_index(text: str) -> int:
+        """把热搜指数文本（如"4,960,000"、"496万"）转换为整数"""
+        text = text.replace(',', '').strip()
+        match = re.match(r'(\d+(?:\.\d+)?)\s*(万|亿)?', text)
+        if not match:
+            return 0
+        scale = {'万': 10 ** 4, '亿': 10 ** 8}.get(match.group(2), 1)
+        return int(float(match.group(1)) * scale)
     
-    def get_hot_list(self) -> List[Tuple[int, str, str]]:
+    def get_hot_list(self, verbose: bool = True) -> List[Tuple[int, str, str]]:
         """获取百度热搜Top10"""
-        print("开始爬取百度热搜...")
+        if verbose:
+            print("开始爬取百度热搜...")
         
         try:
-            # 发送请求
-            req = urllib.request.Request(self.url, headers=self.headers)
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                html = response.read().decode('utf-8')
+            # 发送请求，内容未变化时服务器返回304，直接使用缓存
+            html = self.client.get_text(self.url)
             
             # 解析HTML
-            soup = BeautifulSoup(html, 'html.parser')
-            hot_items = soup.select('.category-wrap_iQLoo')[:10]
+            hot_items = self.parser.baidu_items(html)[:10]
             
             hot_list = []
-            for i, item in enumerate(hot_items, 1):
-                title_elem = item.select_one('.c-single-text-ellipsis')
-                hot_elem = item.select_one('.hot-index_1Bl1a')
-                
-                if title_elem and hot_elem:
-                    title = title_elem.get_text(strip=True)
-                    hot_index = hot_elem.get_text(strip=True).replace(',', '')
+            for i, (title, hot_text) in enumerate(hot_items, 1):
+                if title is not None and hot_text is not None:
+                    hot_index = hot_text.replace(',', '')
                     hot_list.append((i, title, hot_index))
-                    print(f"{i}. {title} - {hot_index}")
+                    if verbose:
+                        print(f"{i}. {title} - {hot_index}")
             
             return hot_list
             
@@ -48,6 +66,11 @@ class BaiduHotSearch:
 class MySQLDatabase:
     """MySQL数据库操作类"""
     
+    # hot_titles.title的列宽（字符数）
+    TITLE_LENGTH = 255
+    # 标题id缓存最多保留的标题数，超出时淘汰最久未用的
+    TITLE_CACHE_SIZE = 10000
+    
     def __init__(self, host: str = 'localhost', user: str = 'root', 
                  password: str = 'tmnwsdlc', database: str = 'hotsearch_db'):
         self.host = host
@@ -55,6 +78,8 @@ class MySQLDatabase:
         self.password = password
         self.database = database
         self.connection = None
+        # 已写入维度表的标题 -> id，按最近使用排序
+        self._title_ids: 'OrderedDict[str, int]' = OrderedDict()
     
     def connect(self) -> bool:
         """连接到MySQL服务器"""
@@ -98,28 +123,231 @@ class MySQLDatabase:
             return False
         
         try:
-            cursor = self.connection.cursor()
-            # 插入数据
-            for rank, title, hot_index in hot_list:
-                cursor.execute(
-                    "INSERT INTO baidu_hot (hot_rank, title, hot_index) VALUES (%s, %s, %s)",
-                    (rank, title, hot_index)
-                )
+            # 多行INSERT批量写入
+            helper = MySqlHelper.from_connection(self.connection)
+            rows = [
+                {'hot_rank': rank, 'title': title, 'hot_index': hot_index}
+                for rank, title, hot_index in hot_list
+            ]
+            if helper.bulk_insert('baidu_hot', rows, report=True) is None:
+                return False
             
-            self.connection.commit()
             print(f"\n成功保存 {len(hot_list)} 条数据到数据库")
-            cursor.close()
             return True
             
         except Exception as e:
             print(f"数据保存错误: {e}")
             return False
     
+    def create_timeseries_tables(self) -> bool:
+        """创建热搜标题维度表和排名快照表"""
+        try:
+            cursor = self.connection.cursor()
+            # 每个标题只存一次；按二进制比较，大小写不同的标题视为不同标题
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS hot_titles (
+                    id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+                    title VARCHAR(255) COLLATE utf8mb4_bin NOT NULL,
+                    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE KEY uk_hot_titles_title (title)
+                )
+            """)
+            # 每次采集每个排名一行，主键按时间排列；按标题查询历史走二级索引
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS hot_snapshots (
+                    crawl_time DATETIME NOT NULL,
+                    hot_rank TINYINT UNSIGNED NOT NULL,
+                    title_id INT UNSIGNED NOT NULL,
+                    hot_index BIGINT UNSIGNED NOT NULL,
+                    PRIMARY KEY (crawl_time, hot_rank),
+                    KEY idx_hot_snapshots_title (title_id, crawl_time)
+                )
+            """)
+            cursor.close()
+            return True
+        except Exception as e:
+            print(f"创建时间序列表错误: {e}")
+            return False
+    
+    def ensure_connection(self) -> bool:
+        """长时间运行时连接可能被服务器断开，断开后重新连接并选择数据库"""
+        try:
+            self.connection.ping(reconnect=True, attempts=3, delay=5)
+            cursor = self.connection.cursor()
+            cursor.execute(f"USE {self.database}")
+            cursor.close()
+            return True
+        except Exception as e:
+            print(f"数据库重连错误: {e}")
+            return False
+    
+    @classmethod
+    def normalize_title(cls, title: str) -> str:
+        """转换为写入hot_titles的形式：去掉首尾空白并截断到列宽"""
+        return title.strip()[:cls.TITLE_LENGTH]
+    
+    def get_title_ids(self, titles: List[str]) -> Optional[Dict[str, int]]:
+        """
+        返回标题对应的id，新标题先写入维度表
+        
+        Returns:
+            Optional[Dict[str, int]]: 标题 -> id，仍找不到id的标题不在结果中；数据库出错返回None
+        """
+        normalized = {title: self.normalize_title(title) for title in titles}
+        ids, missing = {}, []
+        for key in dict.fromkeys(normalized.values()):
+            if key in self._title_ids:
+                self._title_ids.move_to_end(key)
+                ids[key] = self._title_ids[key]
+            else:
+                missing.append(key)
+        
+        if missing:
+            helper = MySqlHelper.from_connection(self.connection)
+            # 已存在的标题在唯一键冲突时保持不变
+            if helper.bulk_insert('hot_titles', [{'title': title} for title in missing],
+                                  update_columns=['title']) is None:
+                return None
+            
+            # 按列的排序规则比较并返回查询用的标题，表中保存的形式不同时（如旧表使用
+            # 不区分大小写的排序规则）也能对应到查询的标题
+            wanted = ' UNION ALL '.join(['SELECT %s AS title'] * len(missing))
+            rows = helper.fetch_all(f"""
+                SELECT wanted.title AS requested, hot_titles.id
+                FROM ({wanted}) AS wanted JOIN hot_titles ON hot_titles.title = wanted.title
+            """, tuple(missing), cache=False)
+            # 连接不是自动提交时，查询会开启一个读事务；立即结束它，否则快照一直停在
+            # 第一次查询时，之后看不到其他连接新写入的标题
+            helper.commit()
+            if rows is None:
+                return None
+            for row in rows:
+                ids[row['requested']] = row['id']
+                self._title_ids[row['requested']] = row['id']
+            while len(self._title_ids) > self.TITLE_CACHE_SIZE:
+                self._title_ids.popitem(last=False)
+        
+        return {title: ids[key] for title, key in normalized.items() if key in ids}
+    
+    def save_snapshots(self, snapshots: List[Tuple[datetime, List[Tuple[int, str, int]]]]) -> bool:
+        """
+        批量保存多次采集的热搜快照
+        
+        Args:
+            snapshots: (采集时间, [(排名, 标题, 热搜指数), ...]) 列表
+        """
+        if not snapshots:
+            return True
+        
+        try:
+            title_ids = self.get_title_ids([title for _, hot_list in snapshots for _, title, _ in hot_list])
+            if title_ids is None:
+                return False
+            
+            rows, skipped = [], []
+            for crawl_time, hot_list in snapshots:
+                for rank, title, hot_index in hot_list:
+                    if title not in title_ids:
+                        skipped.append(title)
+                        continue
+                    rows.append({'crawl_time': crawl_time, 'hot_rank': rank,
+                                 'title_id': title_ids[title], 'hot_index': hot_index})
+            # 找不到id的行每次重试都会失败，跳过它们，其余快照照常写入
+            if skipped:
+                print(f"{len(skipped)} 行快照的标题找不到id，已跳过: {', '.join(dict.fromkeys(skipped))}")
+            
+            # 重试写入同一批快照时覆盖而不是报主键冲突
+            helper = MySqlHelper.from_connection(self.connection)
+            return helper.bulk_insert('hot_snapshots', rows, update_columns=['title_id', 'hot_index']) is not None
+            
+        except Exception as e:
+            print(f"快照保存错误: {e}")
+            return False
+    
     def close(self):
         """关闭数据库连接"""
         if self.connection:
             self.connection.close()
 
+class HotSearchCollector:
+    """
+    定时采集百度热搜
+    按固定间隔抓取热搜榜，快照先缓存在内存中，每flush_every次采集批量写入一次数据库。
+    与上一次采集内容完全相同的快照不重复保存，查询某一时刻的榜单时取该时刻之前最近的快照。
+    """
+    
+    def __init__(self, spider: BaiduHotSearch, db: MySQLDatabase,
+                 interval: float = 60.0, flush_every: int = 5):
+        """
+        Args:
+            spider: 热搜爬虫
+            db: 已连接并建好表的数据库
+            interval: 采集间隔（秒），快照按秒记录时间，不能小于1秒
+            flush_every: 每多少次采集批量写入一次
+        """
+        self.spider = spider
+        self.db = db
+        self.interval = max(interval, 1.0)
+        self.flush_every = flush_every
+        self.pending: List[Tuple[datetime, List[Tuple[int, str, int]]]] = []
+        self.polls = 0
+        self.saved = 0
+        self._last_snapshot = None
+        self._stop = threading.Event()
+    
+    def poll(self) -> bool:
+        """采集一次，返回是否获取到数据"""
+        self.polls += 1
+        hot_list = self.spider.get_hot_list(verbose=False)
+        if not hot_list:
+            return False
+        
+        snapshot = [(rank, title, self.spider.parse_hot_index(hot_index)) for rank, title, hot_index in hot_list]
+        if snapshot != self._last_snapshot:
+            self._last_snapshot = snapshot
+            self.pending.append((datetime.now().replace(microsecond=0), snapshot))
+        return True
+    
+    def flush(self) -> bool:
+        """写入缓存的快照；写入失败时保留，下次再试"""
+        if not self.pending:
+            return True
+        if not self.db.ensure_connection() or not self.db.save_snapshots(self.pending):
+            print(f"快照写入失败，{len(self.pending)} 个快照等待下次写入")
+            return False
+        
+        self.saved += len(self.pending)
+        self.pending = []
+        return True
+    
+    def run(self, max_polls: Optional[int] = None):
+        """
+        按间隔持续采集，直到调用stop()、按Ctrl+C或达到max_polls次
+        
+        Args:
+            max_polls: 采集次数上限，为None时不限
+        """
+        next_poll = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                if len(self.pending) >= self.flush_every:
+                    self.flush()
+                if max_polls is not None and self.polls >= max_polls:
+                    break
+                
+                # 按计划时间对齐，采集耗时不会累积；落后超过一个间隔时不补采
+                next_poll = max(next_poll + self.interval, time.monotonic())
+                self._stop.wait(next_poll - time.monotonic())
+        except KeyboardInterrupt:
+            print("\n收到中断信号，停止采集")
+        finally:
+            self.flush()
+    
+    def stop(self):
+        """通知run()在当前采集结束后退出"""
+        self._stop.set()
+
 class HotSearchApp:
     """热搜应用主类"""
     
@@ -157,6 +385,24 @@ class HotSearchApp:
         self.db.close()
         print("程序执行完毕！")
     
+    def collect(self, interval: float = 60.0, flush_every: int = 5, max_polls: Optional[int] = None):
+        """持续定时采集热搜，按Ctrl+C停止"""
+        self._print_header()
+        
+        if not self.db.connect():
+            return
+        
+        if not self.db.create_database_and_table() or not self.db.create_timeseries_tables():
+            self.db.close()
+            return
+        
+        print(f"开始定时采集，间隔 {interval:g} 秒，每 {flush_every} 次采集写入一次数据库")
+        collector = HotSearchCollector(self.spider, self.db, interval, flush_every)
+        collector.run(max_polls)
+        
+        self.db.close()
+        print(f"采集结束，共采集 {collector.polls} 次，保存 {collector.saved} 个快照")
+    
     def _print_header(self):
         """打印程序标题"""
         print("=" * 50)
@@ -165,7 +411,18 @@ class HotSearchApp:
 
 def main():
     """程序入口函数"""
+    parser = argparse.ArgumentParser(description="百度热搜爬虫")
+    parser.add_argument('--collect', action='store_true', help="持续定时采集，写入时间序列表")
+    parser.add_argument('--interval', type=float, default=60.0, help="采集间隔（秒）")
+    parser.add_argument('--flush-every', type=int, default=5, help="每多少次采集批量写入一次")
+    parser.add_argument('--max-polls', type=int, default=None, help="采集次数上限，默认不限")
+    args = parser.parse_args()
+    
     app = HotSearchApp()
+    if args.collect:
+        app.collect(args.interval, args.flush_every, args.max_polls)
+        return
+    
     app.run()
     input("按回车退出...")
 
@@ -35,4 +35,8 @@ INSERT INTO user_behavior (user_id, action_type, page_url, action_time, duration
 (1, 'View', '/about', '2024-01-17 09:15:00', 90),
 (2, 'Register', '/register', '2024-01-18 16:45:00', 150),
 (4, 'View', '/products', '2024-01-19 13:20:00', 200),
-(3, 'Click', '/home', '2024-01-20 15:30:00', 75);
\ No newline at end of file
+(3, 'Click', '/home', '2024-01-20 15:30:00', 75);
+
+-- 看板汇总表每次更新时按日期重新聚合最近几天，为日期列建索引（已有数据库单独执行一次）
+CREATE INDEX idx_sales_data_sales_date ON sales_data (sales_date);
+CREATE INDEX idx_user_behavior_action_time ON user_behavior (action_time);
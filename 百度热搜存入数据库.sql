@@ -8,4 +8,19 @@ SELECT * FROM baidu_hot;
 -- 按排名排序查看
 SELECT hot_rank, title, hot_index, crawl_time 
 FROM baidu_hot 
-ORDER BY hot_rank ASC;
\ No newline at end of file
+ORDER BY hot_rank ASC;
+
+-- 定时采集（python week2_revised.py --collect）写入的时间序列
+-- 最近一次采集的榜单
+SELECT s.hot_rank, t.title, s.hot_index, s.crawl_time
+FROM hot_snapshots s
+JOIN hot_titles t ON t.id = s.title_id
+WHERE s.crawl_time = (SELECT MAX(crawl_time) FROM hot_snapshots)
+ORDER BY s.hot_rank;
+
+-- 某个标题的热度变化
+SELECT s.crawl_time, s.hot_rank, s.hot_index
+FROM hot_snapshots s
+JOIN hot_titles t ON t.id = s.title_id
+WHERE t.title = '标题'
+ORDER BY s.crawl_time;
@@ -3,64 +3,103 @@
 第三周任务：豆瓣电影Top100爬虫 + 数据库设计
 """
 
-import urllib.request
-from bs4 import BeautifulSoup
+import hashlib
+import json
+from datetime import datetime
 import mysql.connector
 import re
-import time
-import ssl
-
-# 跳过SSL验证
-ssl._create_default_https_context = ssl._create_unverified_context
+from concurrent.futures import ThreadPoolExecutor
+from HtmlParsers import get_parser
+from HttpClient import HttpCache, HttpClient, TokenBucket
+from MySqlHelper import MySqlHelper
 
 class DoubanMovieSpider:
     """豆瓣电影爬虫类"""
     
-    def __init__(self):
-        self.base_url = "https://movie.douban.com/top250"
+    PAGE_SIZE = 25
+    
+    # 每部电影都要用到的正则表达式，预先编译
+    DIRECTOR_PATTERN = re.compile(r'导演:\s*(.*?)\s*主演:')
+    ACTORS_PATTERN = re.compile(r'主演:\s*(.*?)\s*\d')
+    YEAR_PATTERN = re.compile(r'(\d{4})')
+    NUMBER_PATTERN = re.compile(r'\d+')
+    
+    def __init__(self, base_url="https://movie.douban.com/top250", workers=4, rate=2.0, burst=4,
+                 parser=None, cache_dir='.http_cache', max_age=3600):
+        """
+        Args:
+            base_url: 榜单地址，测试时可指向本地服务
+            workers: 同时抓取的页数上限
+            rate: 平均每秒请求数
+            burst: 允许同时发出的请求数
+            parser: 解析后端名称（'selectolax'、'lxml'、'bs4'），默认使用最快的可用后端
+            cache_dir: 响应缓存目录，为None时不缓存
+            max_age: 缓存新鲜期（秒），过期后向服务器发条件请求
+        """
+        self.base_url = base_url
+        self.parser = get_parser(parser)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
         }
+        self.workers = workers
+        # 用令牌桶代替每页之后固定sleep，连接由客户端的连接池复用，多次爬取之间也不断开
+        cache = HttpCache(cache_dir, max_age) if cache_dir else None
+        self.client = HttpClient(self.headers, timeout=10, rate_limiter=TokenBucket(rate, burst), cache=cache)
+    
+    def close(self):
+        """关闭保持的HTTP连接"""
+        self.client.close()
     
     def get_html(self, url):
         """获取网页内容"""
         try:
-            req = urllib.request.Request(url, headers=self.headers)
-            response = urllib.request.urlopen(req, timeout=10)
-            return response.read().decode('utf-8')
+            return self.client.get_text(url)
         except Exception as e:
             print(f"请求失败: {e}")
             return None
     
-    def crawl_top100(self):
-        """爬取Top100电影"""
-        print("开始爬取豆瓣电影Top100...")
-        all_movies = []
+    def crawl_top100(self, pages=4, concurrent=True):
+        """
+        爬取Top100电影
         
-        # 爬取4页，每页25部电影
-        for page in range(4):
-            start = page * 25
-            url = f"{self.base_url}?start={start}"
-            print(f"爬取第{page + 1}页...")
-            
-            html = self.get_html(url)
-            if html:
-                movies = self.parse_page(html)
-                all_movies.extend(movies)
-                print(f"本页获取 {len(movies)} 部电影")
-            
-            time.sleep(1)
+        Args:
+            pages: 爬取页数，每页25部电影，10页即完整的Top250
+            concurrent: 是否并发抓取各页
+        
+        Returns:
+            list: 按排名排列的电影数据
+        """
+        print(f"开始爬取豆瓣电影Top{pages * self.PAGE_SIZE}...")
+        
+        if concurrent and self.workers > 1 and pages > 1:
+            # map按页码顺序返回结果，总耗时约为最慢一页的耗时
+            with ThreadPoolExecutor(max_workers=min(self.workers, pages)) as executor:
+                results = list(executor.map(self.crawl_page, range(pages)))
+        else:
+            results = [self.crawl_page(page) for page in range(pages)]
+        
+        all_movies = [movie for movies in results for movie in movies]
+        return all_movies[:pages * self.PAGE_SIZE]
+    
+    def crawl_page(self, page):
+        """爬取并解析第page页（从0开始）"""
+        url = f"{self.base_url}?start={page * self.PAGE_SIZE}"
+        print(f"爬取第{page + 1}页...")
         
-        return all_movies[:100]
+        html = self.get_html(url)
+        if not html:
+            return []
+        
+        movies = self.parse_page(html)
+        print(f"第{page + 1}页获取 {len(movies)} 部电影")
+        return movies
     
     def parse_page(self, html):
         """解析单页电影数据"""
-        soup = BeautifulSoup(html, 'html.parser')
-        movie_items = soup.select('.item')
         movies = []
         
-        for item in movie_items:
+        for item in self.parser.douban_items(html):
             movie_data = self.parse_movie_item(item)
             if movie_data:
                 movies.append(movie_data)
@@ -68,37 +107,28 @@ class DoubanMovieSpider:
         return movies
     
     def parse_movie_item(self, item):
-        """解析单个电影信息"""
+        """解析单个电影信息，item为解析后端提取的原始字段，元素不存在时字段为None"""
         try:
             # 排名
-            rank_elem = item.select_one('em')
-            rank = int(rank_elem.get_text()) if rank_elem else 0
+            rank = int(item['rank']) if item['rank'] is not None else 0
             
             # 标题
-            title_elem = item.select_one('.title')
-            title = title_elem.get_text(strip=True) if title_elem else "未知"
+            title = item['title'] if item['title'] is not None else "未知"
             
             # 评分
-            rating_elem = item.select_one('.rating_num')
-            rating = float(rating_elem.get_text()) if rating_elem else 0.0
+            rating = float(item['rating']) if item['rating'] is not None else 0.0
             
             # 评价人数
-            rating_count_elem = item.select_one('.star span:last-child')
-            rating_count_text = rating_count_elem.get_text() if rating_count_elem else ""
-            rating_count = self.extract_number(rating_count_text)
+            rating_count = self.extract_number(item['rating_count'] or "")
             
             # 其他信息
-            info_elem = item.select_one('.bd p')
-            info_text = info_elem.get_text() if info_elem else ""
-            director, actors, year, country, movie_type = self.parse_movie_info(info_text)
+            director, actors, year, country, movie_type = self.parse_movie_info(item['info'] or "")
             
             # 经典台词
-            quote_elem = item.select_one('.quote')
-            quote = quote_elem.get_text(strip=True) if quote_elem else ""
+            quote = item['quote'] or ""
             
             # 链接
-            link_elem = item.select_one('a')
-            link = link_elem['href'] if link_elem else ""
+            link = item['link'] or ""
             
             return {
                 'rank': rank,
@@ -124,12 +154,12 @@ class DoubanMovieSpider:
         
         try:
             # 提取导演
-            director_match = re.search(r'导演:\s*(.*?)\s*主演:', info_text)
+            director_match = self.DIRECTOR_PATTERN.search(info_text)
             if director_match:
                 director = director_match.group(1).strip()
             
             # 提取主演
-            actors_match = re.search(r'主演:\s*(.*?)\s*\d', info_text)
+            actors_match = self.ACTORS_PATTERN.search(info_text)
             if actors_match:
                 actors = actors_match.group(1).strip()
             
@@ -140,7 +170,7 @@ class DoubanMovieSpider:
                 parts = detail_line.split('/')
                 if parts:
                     # 提取年份
-                    year_match = re.search(r'(\d{4})', detail_line)
+                    year_match = self.YEAR_PATTERN.search(detail_line)
                     if year_match:
                         year = int(year_match.group(1))
                     
@@ -157,12 +187,16 @@ class DoubanMovieSpider:
     
     def extract_number(self, text):
         """从文本提取数字"""
-        numbers = re.findall(r'\d+', text.replace(',', ''))
+        numbers = self.NUMBER_PATTERN.findall(text.replace(',', ''))
         return int(numbers[0]) if numbers else 0
 
 class MovieDatabase:
     """电影数据库类"""
     
+    # 参与变化检测的字段，link是唯一键
+    MOVIE_COLUMNS = ['movie_rank', 'title', 'rating', 'rating_count', 'director', 'actors',
+                     'release_year', 'country', 'movie_type', 'quote', 'link']
+    
     def __init__(self, password="tmnwsdlc"):
         self.host = "localhost"
         self.user = "root"
@@ -194,6 +228,7 @@ class MovieDatabase:
             cursor.execute(f"USE {self.database}")
             
             # 创建电影表 - 使用movie_rank代替rank关键字
+            # crawl_time是最后一次写入（新增或内容变化）时的抓取时间，内容未变化的电影不更新
             create_table_sql = """
             CREATE TABLE IF NOT EXISTS movies (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -208,11 +243,28 @@ class MovieDatabase:
                 actors TEXT,
                 quote TEXT,
                 link VARCHAR(500),
-                crawl_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                row_hash CHAR(32),
+                crawl_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uk_movies_link (link)
             )
             """
             
             cursor.execute(create_table_sql)
+            
+            # 旧版本创建的表没有row_hash和唯一键，补上后才能增量更新
+            cursor.execute("SHOW COLUMNS FROM movies LIKE 'row_hash'")
+            if not cursor.fetchall():
+                # 先清理没有链接和链接重复的行（重复的保留id最小的一行），否则无法添加唯一键
+                cursor.execute("DELETE FROM movies WHERE link IS NULL OR link = ''")
+                cursor.execute("""
+                    DELETE newer FROM movies AS newer
+                    JOIN movies AS older ON newer.link = older.link AND newer.id > older.id
+                """)
+                cursor.execute("""
+                    ALTER TABLE movies
+                    ADD COLUMN row_hash CHAR(32) AFTER link,
+                    ADD UNIQUE KEY uk_movies_link (link)
+                """)
             cursor.close()
             print("数据表创建成功")
             return True
@@ -221,41 +273,84 @@ class MovieDatabase:
             print(f"创建数据库失败: {e}")
             return False
     
+    @staticmethod
+    def row_hash(row):
+        """计算一行数据的哈希，用于判断内容是否变化"""
+        data = json.dumps([str(row[column]) for column in MovieDatabase.MOVIE_COLUMNS], ensure_ascii=False)
+        return hashlib.md5(data.encode('utf-8')).hexdigest()
+    
     def save_movies(self, movies):
-        """保存电影数据"""
+        """
+        保存电影数据
+        
+        按link增量更新：只写入新增和内容有变化的电影，删除本次榜单中已不存在的电影。
+        整个过程在一个事务中完成，读取方不会看到更新了一半的表。
+        link是唯一键，没有链接或链接重复的电影会被跳过，不会与其他电影合并成一行。
+        """
         if not movies:
             return False
         
+        helper = MySqlHelper.from_connection(self.connection)
         try:
-            cursor = self.connection.cursor()
+            crawl_time = datetime.now().replace(microsecond=0)
+            # 使用movie_rank字段
+            rows = []
+            skipped = []
+            links = set()
+            for movie in movies:
+                if not movie['link'] or movie['link'] in links:
+                    skipped.append(f"{movie['rank']}. {movie['title']}")
+                    continue
+                links.add(movie['link'])
+                row = {
+                    'movie_rank': movie['rank'], 'title': movie['title'],
+                    'rating': movie['rating'], 'rating_count': movie['rating_count'],
+                    'director': movie['director'], 'actors': movie['actors'],
+                    'release_year': movie['year'], 'country': movie['country'],
+                    'movie_type': movie['movie_type'], 'quote': movie['quote'],
+                    'link': movie['link']
+                }
+                row['row_hash'] = self.row_hash(row)
+                row['crawl_time'] = crawl_time
+                rows.append(row)
+            if skipped:
+                print(f"跳过 {len(skipped)} 部没有链接或链接重复的电影: {', '.join(skipped)}")
+            if not rows:
+                return False
             
-            # 清空旧数据
-            cursor.execute("DELETE FROM movies")
+            helper.begin_transaction()
+            existing = helper.fetch_all("SELECT link, row_hash FROM movies FOR UPDATE", cache=False)
+            if existing is None:
+                helper.rollback()
+                return False
+            existing = {row['link']: row['row_hash'] for row in existing}
             
-            # 插入新数据 - 使用movie_rank字段
-            insert_sql = """
-            INSERT INTO movies (movie_rank, title, rating, rating_count, director, 
-                              actors, release_year, country, movie_type, quote, link)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
+            changed = [row for row in rows if existing.get(row['link']) != row['row_hash']]
+            crawled = {row['link'] for row in rows}
+            removed = [link for link in existing if link not in crawled]
             
-            count = 0
-            for movie in movies:
-                cursor.execute(insert_sql, (
-                    movie['rank'], movie['title'], movie['rating'],
-                    movie['rating_count'], movie['director'], movie['actors'],
-                    movie['year'], movie['country'], movie['movie_type'],
-                    movie['quote'], movie['link']
-                ))
-                count += 1
+            # 新增和变化的行用 INSERT ... ON DUPLICATE KEY UPDATE 批量写入
+            update_columns = [column for column in rows[0] if column != 'link']
+            if helper.bulk_insert('movies', changed, update_columns=update_columns) is None:
+                helper.rollback()
+                return False
             
-            self.connection.commit()
-            cursor.close()
-            print(f"成功保存 {count} 部电影数据")
+            if removed:
+                placeholders = ', '.join(['%s'] * len(removed))
+                if helper.delete('movies', f"link IN ({placeholders})", tuple(removed)) is None:
+                    helper.rollback()
+                    return False
+            
+            helper.commit()
+            inserted = sum(1 for row in changed if row['link'] not in existing)
+            print(f"成功保存 {len(rows)} 部电影数据：新增 {inserted} 部，更新 {len(changed) - inserted} 部，"
+                  f"删除 {len(removed)} 部，未变化 {len(rows) - len(changed)} 部")
             return True
             
         except Exception as e:
             print(f"保存数据失败: {e}")
+            if helper.in_transaction:
+                helper.rollback()
             return False
     
     def close(self):
@@ -279,7 +374,10 @@ class DoubanMovieApp:
         
         # 爬取数据
         print("1. 开始爬取电影数据...")
-        movies = self.spider.crawl_top100()
+        try:
+            movies = self.spider.crawl_top100()
+        finally:
+            self.spider.close()
         
         if not movies:
             print("爬取数据失败")